@@ -1,8 +1,11 @@
-import dataclasses
 from abc import abstractmethod
+import re
 import typing
 from typing import (
     Any,
+    AsyncIterator,
+    Callable,
+    Dict,
     Generic,
     Iterable,
     Optional,
@@ -10,7 +13,10 @@ from typing import (
     TypeVar,
 )
 
-from aiohttp import ClientSession
+from aiohttp import (
+    ClientSession,
+    TCPConnector,
+)
 from pypika import (  # type: ignore
     ClickHouseQuery,
     Criterion,
@@ -21,7 +27,10 @@ from pypika import (  # type: ignore
     Table,
     functions as fn,
 )
-from pypika.terms import PseudoColumn  # type: ignore
+from pypika.terms import (  # type: ignore
+    PseudoColumn,
+    Term,
+)
 from pypika.clickhouse.array import Array, HasAny, Field  # type: ignore
 from pypika.clickhouse.search_string import Match  # type: ignore
 
@@ -30,14 +39,189 @@ from .core import (
     FilterType,
     NotFound,
     QueryError,
+    _field_names,
+    _filter_key,
+    _wildcard,
 )
 
 
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+
+    def _json_dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, default=str)
+
+except ImportError:
+    import json
+
+    _json_loads = json.loads
+
+    def _json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj, default=str).encode()
+
+
 T = TypeVar("T")
 
+_FORMAT_JSON_COMPACT = b" FORMAT JSONCompact"
+
 _is_ip_address_in_range = CustomFunction("isIPAddressInRange", ["address", "prefix"])
 _is_null = CustomFunction("isNull", ["x"])
 _is_not_null = CustomFunction("isNotNull", ["x"])
+_starts_with = CustomFunction("startsWith", ["s", "prefix"])
+_ends_with = CustomFunction("endsWith", ["s", "suffix"])
+_length = CustomFunction("length", ["s"])
+
+_LITERAL = r"[A-Za-z0-9 ]+"
+_ANCHORED_BOTH = re.compile(rf"\^({_LITERAL})\.\*({_LITERAL})\$")
+_ANCHORED_START = re.compile(rf"\^({_LITERAL})")
+_ANCHORED_END = re.compile(rf"({_LITERAL})\$")
+
+
+def _match_criterion(c: Any, v: str) -> Criterion:
+    """Criterion for a MATCHES filter.
+
+    Patterns that are just anchored literals are rewritten
+    to startsWith/endsWith, sparing the server a regex engine
+    run per row; everything else goes through match().
+    """
+    m = _ANCHORED_BOTH.fullmatch(v)
+    if m:
+        prefix, suffix = m.group(1), m.group(2)
+        # The length guard keeps overlapping matches out:
+        # ^ab.*ba$ must not accept "aba".
+        return (
+            _starts_with(c, prefix)
+            & _ends_with(c, suffix)
+            & (_length(c) >= len(prefix) + len(suffix))
+        )
+
+    m = _ANCHORED_START.fullmatch(v)
+    if m:
+        return _starts_with(c, m.group(1))
+
+    m = _ANCHORED_END.fullmatch(v)
+    if m:
+        return _ends_with(c, m.group(1))
+
+    return Match(c, v)
+
+
+def _imatch_criterion(c: Any, v: str) -> Criterion:
+    """Criterion for an IMATCHES filter.
+    The anchored-literal rewrite uses ILIKE because
+    startsWith/endsWith have no case-insensitive form;
+    the literals above cannot contain LIKE wildcards.
+    """
+    m = _ANCHORED_BOTH.fullmatch(v)
+    if m:
+        prefix, suffix = m.group(1), m.group(2)
+        return (
+            c.ilike(f"{prefix}%")
+            & c.ilike(f"%{suffix}")
+            & (_length(c) >= len(prefix) + len(suffix))
+        )
+
+    m = _ANCHORED_START.fullmatch(v)
+    if m:
+        return c.ilike(f"{m.group(1)}%")
+
+    m = _ANCHORED_END.fullmatch(v)
+    if m:
+        return c.ilike(f"%{m.group(1)}")
+
+    return Match(c, "(?i)" + v)
+
+
+_FILTER_DISPATCH: Dict[FilterType, Callable[[Any, Any], Criterion]] = {
+    FilterType.EQ: lambda c, v: _is_null(c) if v is None else c == v,
+    FilterType.NEQ: lambda c, v: _is_not_null(c) if v is None else c != v,
+    FilterType.IEQ: lambda c, v: _is_null(c) if v is None else c.ilike(v),
+    FilterType.INEQ: lambda c, v: _is_not_null(c) if v is None else c.not_ilike(v),
+    FilterType.LT: lambda c, v: c < v,
+    FilterType.GT: lambda c, v: c > v,
+    FilterType.LTE: lambda c, v: c <= v,
+    FilterType.GTE: lambda c, v: c >= v,
+    FilterType.STARTSWITH: lambda c, v: c.like(_wildcard("", v, "%")),
+    FilterType.NSTARTSWITH: lambda c, v: c.not_like(_wildcard("", v, "%")),
+    FilterType.ENDSWITH: lambda c, v: c.like(_wildcard("%", v, "")),
+    FilterType.NENDSWITH: lambda c, v: c.not_like(_wildcard("%", v, "")),
+    FilterType.ISTARTSWITH: lambda c, v: c.ilike(_wildcard("", v, "%")),
+    FilterType.NISTARTSWITH: lambda c, v: c.not_ilike(_wildcard("", v, "%")),
+    FilterType.IENDSWITH: lambda c, v: c.ilike(_wildcard("%", v, "")),
+    FilterType.NIENDSWITH: lambda c, v: c.not_ilike(_wildcard("%", v, "")),
+    FilterType.CONTAINS: lambda c, v: c.like(_wildcard("%", v, "%")),
+    FilterType.NCONTAINS: lambda c, v: c.not_like(_wildcard("%", v, "%")),
+    FilterType.ICONTAINS: lambda c, v: c.ilike(_wildcard("%", v, "%")),
+    FilterType.NICONTAINS: lambda c, v: c.not_ilike(_wildcard("%", v, "%")),
+    FilterType.IN: lambda c, v: c.isin(v),
+    FilterType.NIN: lambda c, v: c.notin(v),
+    FilterType.MATCHES: _match_criterion,
+    FilterType.NMATCHES: lambda c, v: Not(_match_criterion(c, v)),
+    FilterType.IMATCHES: _imatch_criterion,
+    FilterType.NIMATCHES: lambda c, v: Not(_imatch_criterion(c, v)),
+    FilterType.IPIN: _is_ip_address_in_range,
+    FilterType.NIPIN: lambda c, v: Not(_is_ip_address_in_range(c, v)),
+    FilterType.HASANY: lambda c, v: HasAny(c, Array(list(v))),
+}
+
+_FILTER_DISPATCH_TABLE: list = [None] * (len(FilterType) + 1)
+
+for _type, _make in _FILTER_DISPATCH.items():
+    _FILTER_DISPATCH_TABLE[_type] = _make
+
+
+_PARAM_DISPATCH: Dict[FilterType, Callable[[Any, Parameter], Criterion]] = {
+    **{
+        t: make
+        for t, make in _FILTER_DISPATCH.items()
+        if t
+        not in (
+            FilterType.IN,
+            FilterType.NIN,
+            FilterType.HASANY,
+            FilterType.MATCHES,
+            FilterType.NMATCHES,
+            FilterType.IMATCHES,
+            FilterType.NIMATCHES,
+        )
+    },
+    FilterType.STARTSWITH: lambda c, p: c.like(p),
+    FilterType.NSTARTSWITH: lambda c, p: c.not_like(p),
+    FilterType.ISTARTSWITH: lambda c, p: c.ilike(p),
+    FilterType.NISTARTSWITH: lambda c, p: c.not_ilike(p),
+    FilterType.ENDSWITH: lambda c, p: c.like(p),
+    FilterType.NENDSWITH: lambda c, p: c.not_like(p),
+    FilterType.IENDSWITH: lambda c, p: c.ilike(p),
+    FilterType.NIENDSWITH: lambda c, p: c.not_ilike(p),
+    FilterType.CONTAINS: lambda c, p: c.like(p),
+    FilterType.NCONTAINS: lambda c, p: c.not_like(p),
+    FilterType.ICONTAINS: lambda c, p: c.ilike(p),
+    FilterType.NICONTAINS: lambda c, p: c.not_ilike(p),
+}
+"""Criterion builders for filters whose value can fill
+a placeholder in a cached statement. The wildcard family
+takes a plain placeholder because the ``%`` signs move
+into the substituted value. IN, NIN and HASANY are absent
+since their sequence values render inline through the
+regular dispatch table, and so is the regex family,
+whose ``match`` function quotes its argument itself."""
+
+_PARAM_TRANSFORMS: Dict[FilterType, Callable[[Any], Any]] = {
+    FilterType.STARTSWITH: lambda v: f"{v}%",
+    FilterType.NSTARTSWITH: lambda v: f"{v}%",
+    FilterType.ISTARTSWITH: lambda v: f"{v}%",
+    FilterType.NISTARTSWITH: lambda v: f"{v}%",
+    FilterType.ENDSWITH: lambda v: f"%{v}",
+    FilterType.NENDSWITH: lambda v: f"%{v}",
+    FilterType.IENDSWITH: lambda v: f"%{v}",
+    FilterType.NIENDSWITH: lambda v: f"%{v}",
+    FilterType.CONTAINS: lambda v: f"%{v}%",
+    FilterType.NCONTAINS: lambda v: f"%{v}%",
+    FilterType.ICONTAINS: lambda v: f"%{v}%",
+    FilterType.NICONTAINS: lambda v: f"%{v}%",
+}
 
 
 class ClickHouseRepo(Generic[T]):
@@ -48,6 +232,8 @@ class ClickHouseRepo(Generic[T]):
     id_field = "id"
     """Name of the ID field of an entity."""
 
+    _entity_type: type
+
     @property
     @abstractmethod
     def table(self) -> Table:
@@ -55,11 +241,58 @@ class ClickHouseRepo(Generic[T]):
         It is used to autogenerate SQL queries.
         """
 
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+
+        for base in cls.__dict__.get("__orig_bases__", ()):
+            args = typing.get_args(base)
+            if args:
+                cls._entity_type = args[0]
+                break
+
     def __init__(self, session: ClientSession) -> None:
         """:param session: Client session for
         making HTTP requests to ClickHouse.
         """
         self.session = session
+        self._criterion_cache: Dict[tuple, Criterion] = {}
+        self._sql_cache: Dict[tuple, str] = {}
+        self._col_cache: Dict[str, Any] = {}
+
+    def _col(self, name: str) -> Any:
+        """Column of the main table, cached by name
+        to avoid allocating an identical field object
+        for every filter of every query.
+        """
+        try:
+            return self._col_cache[name]
+        except KeyError:
+            column = self._col_cache[name] = self.table[name]
+            return column
+
+    @classmethod
+    def make_session(cls, base_url: Any, pool_size: int = 32) -> ClientSession:
+        """Create a client session tuned for ClickHouse:
+        connections are kept alive between queries and the
+        connection pool is sized for concurrent use.
+
+        Prefer this to a :class:`aiohttp.ClientSession`
+        with default settings when the repository
+        is shared between many concurrent tasks.
+
+        :param base_url: URL of the ClickHouse HTTP interface.
+        :param pool_size: Maximum number of open connections.
+        """
+        return ClientSession(
+            base_url,
+            connector=TCPConnector(
+                limit=pool_size,
+                limit_per_host=pool_size,
+                keepalive_timeout=300,
+                ttl_dns_cache=600,
+                enable_cleanup_closed=True,
+            ),
+        )
 
     @property
     def query(self) -> ClickHouseQuery:
@@ -72,10 +305,6 @@ class ClickHouseRepo(Generic[T]):
         """
         return ClickHouseQuery.from_(self.table).select("*")
 
-    @property
-    def _entity_type(self) -> type:
-        return typing.get_args(self.__orig_bases__[0])[0]  # type: ignore
-
     def load(self, record: dict) -> T:
         """Map a database record to an entity.
 
@@ -88,39 +317,46 @@ class ClickHouseRepo(Generic[T]):
 
         Override this method if needed.
         """
-        return dataclasses.asdict(entity)
+        return {name: getattr(entity, name) for name in _field_names(type(entity))}
 
     async def request_json(self, query: ClickHouseQuery) -> dict:
-        query_str = str(query) + " FORMAT JSON"
+        body = str(query).encode() + _FORMAT_JSON_COMPACT
 
         async with self.session.post(
             "/",
-            data=query_str,
+            data=body,
         ) as resp:
+            raw = await resp.read()
+
             if resp.status != 200:
                 raise QueryError(
-                    message=(await resp.read()).decode(),
-                    query=query_str,
+                    message=raw.decode(),
+                    query=body.decode(),
                 )
 
-            data = await resp.json()
-            return data
+            return _json_loads(raw)
 
     async def request(self, query: ClickHouseQuery) -> bytes:
-        query_str = str(query)
+        body = str(query).encode()
 
         async with self.session.post(
             "/",
-            data=query_str,
+            data=body,
         ) as resp:
+            data = await resp.read()
+
             if resp.status != 200:
                 raise QueryError(
-                    message=(await resp.read()).decode(),
-                    query=query_str,
+                    message=data.decode(),
+                    query=body.decode(),
                 )
-            data = await resp.read()
+
             return data
 
+    def _records(self, data: dict) -> Iterable[dict]:
+        names = [column["name"] for column in data["meta"]]
+        return (dict(zip(names, row)) for row in data["data"])
+
     async def fetch_one(self, query: ClickHouseQuery) -> T:
         """Find a record in the database
         and map it to an entity.
@@ -130,14 +366,14 @@ class ClickHouseRepo(Generic[T]):
         if data["rows"] < 1:
             raise NotFound
 
-        return self.load(data["data"][0])
+        return self.load(next(iter(self._records(data))))
 
     async def fetch_many(self, query: ClickHouseQuery) -> Iterable[T]:
         """Find multiple records in the database
         and map them to entities.
         """
         data = await self.request_json(query)
-        return map(self.load, data["data"])
+        return map(self.load, self._records(data))
 
     async def add(self, entity: T) -> None:
         data = self.dump(entity)
@@ -150,28 +386,69 @@ class ClickHouseRepo(Generic[T]):
         await self.request(query)
 
     async def add_many(self, entities: Iterable[T]) -> None:
-        entities = list(entities)
+        entities = iter(entities)
 
-        if len(entities) == 0:
+        try:
+            first = self.dump(next(entities))
+        except StopIteration:
             return
 
-        data = self.dump(entities[0])
+        table = self.table.get_sql(quote_char='"')
+        columns = ",".join(f'"{name}"' for name in first)
+        statement = f"INSERT INTO {table} ({columns}) FORMAT JSONEachRow\n"
 
-        query = (
-            ClickHouseQuery.into(self.table)
-            .columns(*data.keys())
-            .insert(*[tuple(self.dump(e).values()) for e in entities])
-        )
+        async def body() -> AsyncIterator[bytes]:
+            """Stream the statement and one JSON line per record,
+            so the batch is never assembled in memory at once.
+            """
+            yield statement.encode()
+            yield _json_dumps(first) + b"\n"
 
-        await self.request(query)
+            for entity in entities:
+                yield _json_dumps(self.dump(entity)) + b"\n"
 
-    async def get(self, **kwargs: Any) -> T:
-        query = self.query.limit(1)
+        async with self.session.post("/", data=body()) as resp:
+            data = await resp.read()
+
+            if resp.status != 200:
+                raise QueryError(
+                    message=data.decode(),
+                    query=statement,
+                )
+
+    def _lookup_sql(self, method: str, kwargs: dict) -> str:
+        """SQL for a lookup by field-value pairs.
+        The statement is built once per (method, field names)
+        shape with placeholders and cached; only the values
+        are substituted on later calls.
+        """
+        keys = tuple(kwargs)
+
+        try:
+            template = self._sql_cache[(method, keys)]
+        except KeyError:
+            if method == "get":
+                query = self.query.limit(1)
+            elif method == "exists":
+                query = ClickHouseQuery.from_(self.table).select(1).limit(1)
+            elif method == "count":
+                query = ClickHouseQuery.from_(self.table).select(fn.Count("*"))
+            else:
+                query = ClickHouseQuery.from_(self.table).delete()
+
+                if not keys:
+                    query = query.where(PseudoColumn(1) == 1)
+
+            for k in keys:
+                query = query.where(self.table[k] == Parameter("{}"))
+
+            template = str(query)
+            self._sql_cache[(method, keys)] = template
 
-        for k, v in kwargs.items():
-            query = query.where(self.table[k] == v)
+        return template.format(*(str(Term.wrap_constant(v)) for v in kwargs.values()))
 
-        return await self.fetch_one(query)
+    async def get(self, **kwargs: Any) -> T:
+        return await self.fetch_one(self._lookup_sql("get", kwargs))
 
     async def get_for_update(self, **kwargs: Any) -> T:
         return await self.get(**kwargs)
@@ -184,15 +461,94 @@ class ClickHouseRepo(Generic[T]):
         page: int = 1,
         offset: int = 0,
     ) -> Iterable[T]:
-        query = self._params_to_query(
-            filters=filters,
-            order=order,
-            limit=limit,
-            page=page,
-            offset=offset,
-        )
+        try:
+            shape = tuple(self._filter_shape(f) for f in filters)
+        except KeyError:
+            shape = None
+
+        if shape is None:
+            query = self._params_to_query(
+                filters=filters,
+                order=order,
+                limit=limit,
+                page=page,
+                offset=offset,
+            )
+            return await self.fetch_many(query)
+
+        key = ("get_many", shape, tuple(order), limit, page, offset)
+        params: list = []
 
-        return await self.fetch_many(query)
+        try:
+            template = self._sql_cache[key]
+        except KeyError:
+            query = self._params_to_query(
+                order=order, limit=limit, page=page, offset=offset
+            )
+
+            if filters:
+                query = query.where(
+                    Criterion.all(
+                        [self._parametrized_criterion(f, params) for f in filters]
+                    )
+                )
+
+            if len(self._sql_cache) >= 512:
+                self._sql_cache.clear()
+
+            template = self._sql_cache[key] = str(query)
+        else:
+            for f in filters:
+                self._collect_params(f, params)
+
+        sql = template.format(*(str(Term.wrap_constant(v)) for v in params))
+        return await self.fetch_many(sql)
+
+    def _filter_shape(self, f: F) -> tuple:
+        """Structural signature of a filter: types, fields
+        and negations without the values.
+        Raises ``KeyError`` for filters whose value cannot
+        fill a placeholder.
+        """
+        if f.type == FilterType.OR or f.type == FilterType.AND:
+            return (f.type, f.not_, tuple(self._filter_shape(ff) for ff in f.value))
+
+        if f.value is None or f.type not in _PARAM_DISPATCH:
+            raise KeyError(f.type)
+
+        return (f.type, f.field, f.not_)
+
+    def _parametrized_criterion(self, f: F, params: list) -> Criterion:
+        """Compile a filter to a criterion with ``{}``
+        placeholders, appending the values to fill them
+        to ``params`` in traversal order.
+        """
+        if f.type == FilterType.OR or f.type == FilterType.AND:
+            combine = Criterion.any if f.type == FilterType.OR else Criterion.all
+            criterion = combine(
+                [self._parametrized_criterion(ff, params) for ff in f.value]
+            )
+        else:
+            transform = _PARAM_TRANSFORMS.get(f.type)
+            params.append(transform(f.value) if transform else f.value)
+            criterion = _PARAM_DISPATCH[f.type](self._col(f.field), Parameter("{}"))
+
+        if f.not_:
+            return Not(criterion)
+
+        return criterion
+
+    def _collect_params(self, f: F, params: list) -> None:
+        """Gather values in the same order
+        :meth:`_parametrized_criterion` would emit them,
+        for calls that hit the SQL cache.
+        """
+        if f.type == FilterType.OR or f.type == FilterType.AND:
+            for ff in f.value:
+                self._collect_params(ff, params)
+        else:
+            transform = _PARAM_TRANSFORMS.get(f.type)
+            params.append(transform(f.value) if transform else f.value)
 
     def _params_to_query(
         self,
@@ -215,90 +571,43 @@ class ClickHouseRepo(Generic[T]):
             else:
                 query = query.orderby(field)
 
-        for f in filters:
-            criterion = self._filter_to_criterion(f)
-            query = query.where(criterion)
+        if filters:
+            query = query.where(
+                Criterion.all([self._cached_criterion(f) for f in filters])
+            )
 
         return query
 
+    def _cached_criterion(self, f: F) -> Criterion:
+        """Compile a filter to a criterion, reusing
+        the result of an earlier compilation
+        of an identical filter.
+        """
+        try:
+            key = _filter_key(f)
+        except TypeError:
+            return self._filter_to_criterion(f)
+
+        try:
+            return self._criterion_cache[key]
+        except KeyError:
+            pass
+
+        if len(self._criterion_cache) >= 128:
+            self._criterion_cache.clear()
+
+        criterion = self._criterion_cache[key] = self._filter_to_criterion(f)
+        return criterion
+
     def _filter_to_criterion(self, f: F) -> Criterion:
-        column = self.table[f.field]
         criterion: Any = None
 
         if f.type == FilterType.OR:
             criterion = Criterion.any([self._filter_to_criterion(ff) for ff in f.value])
         elif f.type == FilterType.AND:
             criterion = Criterion.all([self._filter_to_criterion(ff) for ff in f.value])
-        elif f.type == FilterType.EQ:
-            if f.value is None:
-                criterion = _is_null(column)
-            else:
-                criterion = column == f.value
-        elif f.type == FilterType.NEQ:
-            if f.value is None:
-                criterion = _is_not_null(column)
-            else:
-                criterion = column != f.value
-        elif f.type == FilterType.IEQ:
-            if f.value is None:
-                criterion = _is_null(column)
-            else:
-                criterion = column.ilike(f.value)
-        elif f.type == FilterType.INEQ:
-            if f.value is None:
-                criterion = _is_not_null(column)
-            else:
-                criterion = column.not_ilike(f.value)
-        elif f.type == FilterType.LT:
-            criterion = column < f.value
-        elif f.type == FilterType.GT:
-            criterion = column > f.value
-        elif f.type == FilterType.LTE:
-            criterion = column <= f.value
-        elif f.type == FilterType.GTE:
-            criterion = column >= f.value
-        elif f.type == FilterType.STARTSWITH:
-            criterion = column.like(f"{f.value}%")
-        elif f.type == FilterType.NSTARTSWITH:
-            criterion = column.not_like(f"{f.value}%")
-        elif f.type == FilterType.ENDSWITH:
-            criterion = column.like(f"%{f.value}")
-        elif f.type == FilterType.NENDSWITH:
-            criterion = column.not_like(f"%{f.value}")
-        elif f.type == FilterType.ISTARTSWITH:
-            criterion = column.ilike(f"{f.value}%")
-        elif f.type == FilterType.NISTARTSWITH:
-            criterion = column.not_ilike(f"{f.value}%")
-        elif f.type == FilterType.IENDSWITH:
-            criterion = column.ilike(f"%{f.value}")
-        elif f.type == FilterType.NIENDSWITH:
-            criterion = column.not_ilike(f"%{f.value}")
-        elif f.type == FilterType.CONTAINS:
-            criterion = column.like(f"%{f.value}%")
-        elif f.type == FilterType.NCONTAINS:
-            criterion = column.not_like(f"%{f.value}%")
-        elif f.type == FilterType.ICONTAINS:
-            criterion = column.ilike(f"%{f.value}%")
-        elif f.type == FilterType.NICONTAINS:
-            criterion = column.not_ilike(f"%{f.value}%")
-        elif f.type == FilterType.IN:
-            criterion = column.isin(f.value)
-        elif f.type == FilterType.NIN:
-            criterion = column.notin(f.value)
-        elif f.type == FilterType.MATCHES:
-            criterion = Match(column, f.value)
-        elif f.type == FilterType.NMATCHES:
-            criterion = Not(Match(column, f.value))
-        elif f.type == FilterType.IMATCHES:
-            criterion = Match(column, "(?i)" + f.value)
-        elif f.type == FilterType.NIMATCHES:
-            criterion = Not(Match(column, "(?i)" + f.value))
-        elif f.type == FilterType.IPIN:
-            criterion = _is_ip_address_in_range(column, f.value)
-        elif f.type == FilterType.NIPIN:
-            criterion = Not(_is_ip_address_in_range(column, f.value))
-        elif f.type == FilterType.HASANY:
-            criterion = HasAny(column, Array(list(f.value)))
+        else:
+            criterion = _FILTER_DISPATCH_TABLE[f.type](self._col(f.field), f.value)
 
         if f.not_:
             return Not(criterion)
@@ -308,11 +617,13 @@ class ClickHouseRepo(Generic[T]):
     async def get_first(
         self, filters: Sequence[F] = (), order: Sequence[str] = ()
     ) -> T:
-        try:
-            return list(await self.get_many(filters, order=order, limit=1))[0]
-        except IndexError:
+        entity = next(iter(await self.get_many(filters, order=order, limit=1)), None)
+
+        if entity is None:
             raise NotFound
 
+        return entity
+
     async def update(self, entity: T) -> None:
         """Don't use this method in production
         because ClickHouse isn't good at updating records.
@@ -321,13 +632,17 @@ class ClickHouseRepo(Generic[T]):
         old_entity = await self.get(**{self.id_field: getattr(entity, self.id_field)})
         old_record = self.dump(old_entity)
         record = self.dump(entity)
+        changed = {k: v for k, v in record.items() if old_record[k] != v}
+
+        if not changed:
+            return
+
         query = ClickHouseQuery.update(self.table)
 
-        for k, v in record.items():
-            if old_record[k] != record[k]:
-                query = query.set(k, v)
+        for k, v in changed.items():
+            query = query.set(k, v)
 
-        query = query.where(self.table[self.id_field] == getattr(entity, self.id_field))
+        query = query.where(self._col(self.id_field) == getattr(entity, self.id_field))
         await self.request(query)
 
     async def delete(self, **kwargs: Any) -> None:
@@ -335,40 +650,22 @@ class ClickHouseRepo(Generic[T]):
         because ClickHouse isn't good at deleting records.
         """
 
-        query = ClickHouseQuery.from_(self.table).delete()
-
-        if kwargs:
-            for k, v in kwargs.items():
-                query = query.where(self.table[k] == v)
-        else:
-            query = query.where(PseudoColumn(1) == 1)
-
-        await self.request(query)
+        await self.request(self._lookup_sql("delete", kwargs))
 
     async def exists(self, **kwargs: Any) -> bool:
-        query = ClickHouseQuery.from_(self.table).select(1).limit(1)
-
-        for k, v in kwargs.items():
-            query = query.where(self.table[k] == v)
-
-        data = await self.request_json(query)
+        data = await self.request_json(self._lookup_sql("exists", kwargs))
         return data["rows"] > 0
 
     async def count(self, **kwargs: Any) -> int:
-        query = ClickHouseQuery.from_(self.table).select(fn.Count("*"))
-
-        for k, v in kwargs.items():
-            query = query.where(self.table[k] == v)
-
-        data = await self.request_json(query)
-        return int(data["data"][0]["count()"])
+        data = await self.request_json(self._lookup_sql("count", kwargs))
+        return int(data["data"][0][0])
 
     async def count_filtered(self, filter_: F) -> int:
-        criterion = self._filter_to_criterion(filter_)
+        criterion = self._cached_criterion(filter_)
         query = self.query.where(criterion).distinct()
         query = ClickHouseQuery.from_(query).select(fn.Count(1))
         data = await self.request_json(query)
-        return int(data["data"][0]["count()"])
+        return int(data["data"][0][0])
 
 
 class ClickHouseTransactionManager:
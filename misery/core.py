@@ -1,10 +1,15 @@
 from __future__ import annotations
 
+import dataclasses
 import enum
+import re
 from contextlib import AbstractAsyncContextManager
 from enum import Enum
+from enum import IntEnum
+from functools import lru_cache
 from functools import partial
 from typing import Any
+from typing import Dict
 from typing import Iterable
 from typing import Optional
 from typing import Protocol
@@ -14,7 +19,7 @@ from typing import Union
 from typing import ForwardRef
 
 
-class FilterType(Enum):
+class FilterType(IntEnum):
     EQ = enum.auto()
     IEQ = enum.auto()
     NEQ = enum.auto()
@@ -48,10 +53,23 @@ class FilterType(Enum):
     AND = enum.auto()
 
 
+@lru_cache(maxsize=128)
+def _compile_pattern(value: str, flags: int = 0) -> re.Pattern:
+    """Regular expression compiled once per pattern.
+    The same patterns tend to be filtered on repeatedly,
+    so the compiled objects are shared between filters.
+    """
+    return re.compile(value, flags)
+
+
 class F:
     """Object used for filtering entities
     before getting them from a repository."""
 
+    __slots__ = ("type", "field", "value", "not_", "_compiled")
+
+    _compiled: Optional[re.Pattern]
+
     def __init__(
         self, type: FilterType, field: str, value: Any, not_: bool = False
     ) -> None:
@@ -59,24 +77,47 @@ class F:
         self.field = field
         self.value = value
         self.not_ = not_
+        self._compiled = None
 
     def __repr__(self) -> str:
-        return f"F(type={self.type.__repr__()}, field={self.field.__repr__()}, value={self.value.__repr__()})"
+        return "F(type=%s, field=%r, value=%r, not_=%r)" % (
+            self.type.name,
+            self.field,
+            self.value,
+            self.not_,
+        )
 
     def __invert__(self) -> F:
-        return F(
+        f = F(
             type=self.type,
             field=self.field,
             value=self.value,
             not_=True,
         )
+        f._compiled = self._compiled
+        return f
+
+    @property
+    def compiled(self) -> Optional[re.Pattern]:
+        """Regular expression compiled when the filter
+        was created, or ``None`` for non-regex filters.
+        Repositories that filter on the Python side
+        use it to avoid re-parsing the pattern per entity.
+        """
+        return self._compiled
 
     @classmethod
     def eq(cls, field: str, value: Any) -> F:
         """Create a filter to find entities
         with a specified field value.
         """
-        return cls(FilterType.EQ, field, value)
+        f = cls.__new__(cls)
+        f.type = FilterType.EQ
+        f.field = field
+        f.value = value
+        f.not_ = False
+        f._compiled = None
+        return f
 
     @classmethod
     def ieq(cls, field: str, value: Any) -> F:
@@ -85,7 +126,13 @@ class F:
 
         Case-insensitive.
         """
-        return cls(FilterType.IEQ, field, value)
+        f = cls.__new__(cls)
+        f.type = FilterType.IEQ
+        f.field = field
+        f.value = value
+        f.not_ = False
+        f._compiled = None
+        return f
 
     @classmethod
     def lt(cls, field: str, value: Any) -> F:
@@ -93,7 +140,13 @@ class F:
         with a field value that is
         less than a given one.
         """
-        return cls(FilterType.LT, field, value)
+        f = cls.__new__(cls)
+        f.type = FilterType.LT
+        f.field = field
+        f.value = value
+        f.not_ = False
+        f._compiled = None
+        return f
 
     @classmethod
     def lte(cls, field: str, value: Any) -> F:
@@ -101,7 +154,13 @@ class F:
         with a field value that is
         less than or equal to a given one.
         """
-        return cls(FilterType.LTE, field, value)
+        f = cls.__new__(cls)
+        f.type = FilterType.LTE
+        f.field = field
+        f.value = value
+        f.not_ = False
+        f._compiled = None
+        return f
 
     @classmethod
     def gt(cls, field: str, value: Any) -> F:
@@ -109,7 +168,13 @@ class F:
         with a field value that is
         greater than a given one.
         """
-        return cls(FilterType.GT, field, value)
+        f = cls.__new__(cls)
+        f.type = FilterType.GT
+        f.field = field
+        f.value = value
+        f.not_ = False
+        f._compiled = None
+        return f
 
     @classmethod
     def gte(cls, field: str, value: Any) -> F:
@@ -117,7 +182,13 @@ class F:
         with a field value that is
         greater than or equal to a given one.
         """
-        return cls(FilterType.GTE, field, value)
+        f = cls.__new__(cls)
+        f.type = FilterType.GTE
+        f.field = field
+        f.value = value
+        f.not_ = False
+        f._compiled = None
+        return f
 
     @classmethod
     def neq(cls, field: str, value: Any) -> F:
@@ -125,7 +196,13 @@ class F:
         with a field value that is
         not equal to a given one.
         """
-        return cls(FilterType.NEQ, field, value)
+        f = cls.__new__(cls)
+        f.type = FilterType.NEQ
+        f.field = field
+        f.value = value
+        f.not_ = False
+        f._compiled = None
+        return f
 
     @classmethod
     def ineq(cls, field: str, value: Any) -> F:
@@ -135,7 +212,13 @@ class F:
 
         Case-insensitive.
         """
-        return cls(FilterType.INEQ, field, value)
+        f = cls.__new__(cls)
+        f.type = FilterType.INEQ
+        f.field = field
+        f.value = value
+        f.not_ = False
+        f._compiled = None
+        return f
 
     @classmethod
     def contains(cls, field: str, value: Any) -> F:
@@ -144,7 +227,13 @@ class F:
 
         Case-sensitive.
         """
-        return cls(FilterType.CONTAINS, field, value)
+        f = cls.__new__(cls)
+        f.type = FilterType.CONTAINS
+        f.field = field
+        f.value = value
+        f.not_ = False
+        f._compiled = None
+        return f
 
     @classmethod
     def icontains(cls, field: str, value: str) -> F:
@@ -153,7 +242,13 @@ class F:
 
         Case-insensitive.
         """
-        return cls(FilterType.ICONTAINS, field, value)
+        f = cls.__new__(cls)
+        f.type = FilterType.ICONTAINS
+        f.field = field
+        f.value = value
+        f.not_ = False
+        f._compiled = None
+        return f
 
     @classmethod
     def ncontains(cls, field: str, value: Any) -> F:
@@ -162,7 +257,13 @@ class F:
 
         Case-sensitive.
         """
-        return cls(FilterType.NCONTAINS, field, value)
+        f = cls.__new__(cls)
+        f.type = FilterType.NCONTAINS
+        f.field = field
+        f.value = value
+        f.not_ = False
+        f._compiled = None
+        return f
 
     @classmethod
     def nicontains(cls, field: str, value: str) -> F:
@@ -171,7 +272,13 @@ class F:
 
         Case-insensitive.
         """
-        return cls(FilterType.NICONTAINS, field, value)
+        f = cls.__new__(cls)
+        f.type = FilterType.NICONTAINS
+        f.field = field
+        f.value = value
+        f.not_ = False
+        f._compiled = None
+        return f
 
     @classmethod
     def startswith(cls, field: str, value: str) -> F:
@@ -180,7 +287,13 @@ class F:
 
         Case-sensitive.
         """
-        return cls(FilterType.STARTSWITH, field, value)
+        f = cls.__new__(cls)
+        f.type = FilterType.STARTSWITH
+        f.field = field
+        f.value = value
+        f.not_ = False
+        f._compiled = None
+        return f
 
     @classmethod
     def istartswith(cls, field: str, value: str) -> F:
@@ -189,7 +302,13 @@ class F:
 
         Case-insensitive.
         """
-        return cls(FilterType.ISTARTSWITH, field, value)
+        f = cls.__new__(cls)
+        f.type = FilterType.ISTARTSWITH
+        f.field = field
+        f.value = value
+        f.not_ = False
+        f._compiled = None
+        return f
 
     @classmethod
     def nstartswith(cls, field: str, value: str) -> F:
@@ -198,7 +317,13 @@ class F:
 
         Case-sensitive.
         """
-        return cls(FilterType.NSTARTSWITH, field, value)
+        f = cls.__new__(cls)
+        f.type = FilterType.NSTARTSWITH
+        f.field = field
+        f.value = value
+        f.not_ = False
+        f._compiled = None
+        return f
 
     @classmethod
     def nistartswith(cls, field: str, value: str) -> F:
@@ -207,7 +332,13 @@ class F:
 
         Case-insensitive.
         """
-        return cls(FilterType.NISTARTSWITH, field, value)
+        f = cls.__new__(cls)
+        f.type = FilterType.NISTARTSWITH
+        f.field = field
+        f.value = value
+        f.not_ = False
+        f._compiled = None
+        return f
 
     @classmethod
     def endswith(cls, field: str, value: str) -> F:
@@ -216,7 +347,13 @@ class F:
 
         Case-sensitive.
         """
-        return cls(FilterType.ENDSWITH, field, value)
+        f = cls.__new__(cls)
+        f.type = FilterType.ENDSWITH
+        f.field = field
+        f.value = value
+        f.not_ = False
+        f._compiled = None
+        return f
 
     @classmethod
     def nendswith(cls, field: str, value: str) -> F:
@@ -225,7 +362,13 @@ class F:
 
         Case-sensitive.
         """
-        return cls(FilterType.NENDSWITH, field, value)
+        f = cls.__new__(cls)
+        f.type = FilterType.NENDSWITH
+        f.field = field
+        f.value = value
+        f.not_ = False
+        f._compiled = None
+        return f
 
     @classmethod
     def iendswith(cls, field: str, value: str) -> F:
@@ -234,7 +377,13 @@ class F:
 
         Case-insensitive.
         """
-        return cls(FilterType.IENDSWITH, field, value)
+        f = cls.__new__(cls)
+        f.type = FilterType.IENDSWITH
+        f.field = field
+        f.value = value
+        f.not_ = False
+        f._compiled = None
+        return f
 
     @classmethod
     def niendswith(cls, field: str, value: str) -> F:
@@ -243,7 +392,13 @@ class F:
 
         Case-insensitive.
         """
-        return cls(FilterType.NIENDSWITH, field, value)
+        f = cls.__new__(cls)
+        f.type = FilterType.NIENDSWITH
+        f.field = field
+        f.value = value
+        f.not_ = False
+        f._compiled = None
+        return f
 
     @classmethod
     def matches(cls, field: str, value: str) -> F:
@@ -253,7 +408,13 @@ class F:
 
         Case-sensitive.
         """
-        return cls(FilterType.MATCHES, field, value)
+        f = cls.__new__(cls)
+        f.type = FilterType.MATCHES
+        f.field = field
+        f.value = value
+        f.not_ = False
+        f._compiled = _compile_pattern(value)
+        return f
 
     @classmethod
     def imatches(cls, field: str, value: str) -> F:
@@ -263,7 +424,13 @@ class F:
 
         Case-insensitive.
         """
-        return cls(FilterType.IMATCHES, field, value)
+        f = cls.__new__(cls)
+        f.type = FilterType.IMATCHES
+        f.field = field
+        f.value = value
+        f.not_ = False
+        f._compiled = _compile_pattern(value, re.IGNORECASE)
+        return f
 
     @classmethod
     def nmatches(cls, field: str, value: str) -> F:
@@ -273,7 +440,13 @@ class F:
 
         Case-sensitive.
         """
-        return cls(FilterType.NMATCHES, field, value)
+        f = cls.__new__(cls)
+        f.type = FilterType.NMATCHES
+        f.field = field
+        f.value = value
+        f.not_ = False
+        f._compiled = _compile_pattern(value)
+        return f
 
     @classmethod
     def nimatches(cls, field: str, value: str) -> F:
@@ -283,7 +456,13 @@ class F:
 
         Case-insensitive.
         """
-        return cls(FilterType.NIMATCHES, field, value)
+        f = cls.__new__(cls)
+        f.type = FilterType.NIMATCHES
+        f.field = field
+        f.value = value
+        f.not_ = False
+        f._compiled = _compile_pattern(value, re.IGNORECASE)
+        return f
 
     @classmethod
     def in_(cls, field: str, value: Any) -> F:
@@ -292,7 +471,13 @@ class F:
 
         Case-sensitive.
         """
-        return cls(FilterType.IN, field, value)
+        f = cls.__new__(cls)
+        f.type = FilterType.IN
+        f.field = field
+        f.value = value
+        f.not_ = False
+        f._compiled = None
+        return f
 
     @classmethod
     def nin(cls, field: str, value: Any) -> F:
@@ -301,7 +486,13 @@ class F:
 
         Case-sensitive.
         """
-        return cls(FilterType.NIN, field, value)
+        f = cls.__new__(cls)
+        f.type = FilterType.NIN
+        f.field = field
+        f.value = value
+        f.not_ = False
+        f._compiled = None
+        return f
 
     @classmethod
     def ipin(cls, field: str, subnet: str) -> F:
@@ -309,7 +500,13 @@ class F:
         whose field is an IP address contained within
         a given subnet.
         """
-        return cls(FilterType.IPIN, field, subnet)
+        f = cls.__new__(cls)
+        f.type = FilterType.IPIN
+        f.field = field
+        f.value = subnet
+        f.not_ = False
+        f._compiled = None
+        return f
 
     @classmethod
     def nipin(cls, field: str, subnet: str) -> F:
@@ -317,7 +514,13 @@ class F:
         whose field is an IP address not contained within
         a given subnet.
         """
-        return cls(FilterType.NIPIN, field, subnet)
+        f = cls.__new__(cls)
+        f.type = FilterType.NIPIN
+        f.field = field
+        f.value = subnet
+        f.not_ = False
+        f._compiled = None
+        return f
 
     @classmethod
     def hasany(cls, field: str, value: Sequence) -> F:
@@ -325,21 +528,39 @@ class F:
         whose array-like field contains any
         value from a given sequence.
         """
-        return cls(FilterType.HASANY, field, value)
+        f = cls.__new__(cls)
+        f.type = FilterType.HASANY
+        f.field = field
+        f.value = value
+        f.not_ = False
+        f._compiled = None
+        return f
 
     @classmethod
     def or_(cls, *filters: F) -> F:
         """Create a filter that combines multiple
         filters with the "OR" operator.
         """
-        return cls(FilterType.OR, "", filters)
+        f = cls.__new__(cls)
+        f.type = FilterType.OR
+        f.field = ""
+        f.value = filters
+        f.not_ = False
+        f._compiled = None
+        return f
 
     @classmethod
     def and_(cls, *filters: F) -> F:
         """Create a filter that combines multiple
         filters with the "AND" operator.
         """
-        return cls(FilterType.AND, "", filters)
+        f = cls.__new__(cls)
+        f.type = FilterType.AND
+        f.field = ""
+        f.value = filters
+        f.not_ = False
+        f._compiled = None
+        return f
 
     def __or__(self, other: F) -> F:
         return F.or_(self, other)
@@ -348,6 +569,55 @@ class F:
         return F.and_(self, other)
 
 
+_FIELD_NAMES: Dict[type, tuple] = {}
+
+
+def _field_names(cls: type) -> tuple:
+    """Names of the fields of a dataclass,
+    resolved once per entity type."""
+    names = _FIELD_NAMES.get(cls)
+
+    if names is None:
+        names = tuple(f.name for f in dataclasses.fields(cls))
+        _FIELD_NAMES[cls] = names
+
+    return names
+
+
+@lru_cache(maxsize=1024)
+def _wildcard(prefix: str, value: str, suffix: str) -> str:
+    """Wrap a value in LIKE wildcards, reusing strings
+    built for recently seen values."""
+    return f"{prefix}{value}{suffix}"
+
+
+_MEMBERSHIP_FILTERS = frozenset({FilterType.IN, FilterType.NIN, FilterType.HASANY})
+
+
+def _filter_key(f: F) -> tuple:
+    """Build a hashable key describing a filter,
+    including its value. Repositories use such keys
+    to cache work done for an already seen filter.
+    Raise :exc:`TypeError` for unhashable filter values.
+
+    Only membership filters treat a list, tuple and set
+    of the same elements as one key; for every other type
+    the container kind stays significant, since e.g.
+    equality against a list and against a tuple
+    are different conditions.
+    """
+    if f.type in (FilterType.OR, FilterType.AND):
+        return (f.type, f.not_, tuple(_filter_key(ff) for ff in f.value))
+
+    value = f.value
+
+    if f.type in _MEMBERSHIP_FILTERS and isinstance(value, (list, tuple, set)):
+        value = frozenset(value)
+
+    hash(value)
+    return (f.type, f.field, value, f.not_)
+
+
 T = TypeVar("T")
 
 
@@ -1,11 +1,14 @@
 from __future__ import annotations
 
 import copy
+import dataclasses
+import heapq
+import itertools
+import keyword
 import operator
 import re
 from abc import abstractmethod
-from functools import reduce
-from functools import total_ordering
+from functools import lru_cache
 from typing import Any
 from typing import Callable
 from typing import Generic
@@ -16,23 +19,104 @@ from typing import TypeVar
 
 import ipaddress
 
-from .core import F, FilterType
+from .core import F, FilterType, _filter_key
 from .core import NotFound
 
 
 T = TypeVar("T")
 
 
-@total_ordering
-class _Desc:
-    def __init__(self, value: Any):
-        self.value = value
+@lru_cache(maxsize=None)
+def _getter(field: str) -> Callable[[Any], Any]:
+    """Accessor for a possibly dotted field path,
+    cached by the path string."""
+    return operator.attrgetter(field)
 
-    def __lt__(self, other: Any) -> bool:
-        return self.value > other.value
 
-    def __eq__(self, other: Any) -> bool:
-        return self.value == other.value
+def _copy_value(value: Any) -> Any:
+    """Copy a field value, recursing only into the builtin
+    containers entities are normally made of."""
+    if isinstance(value, list):
+        return [_copy_value(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _copy_value(item) for key, item in value.items()}
+    if isinstance(value, set):
+        return {_copy_value(item) for item in value}
+    return value
+
+
+_CLONERS: dict = {}
+
+
+def _cloner(cls: type) -> Callable[[Any], Any]:
+    """Specialized clone function for an entity type.
+
+    Dataclasses are cloned field by field, which skips
+    the memo dict and type dispatch of :func:`copy.deepcopy`.
+    Other types fall back to deepcopy.
+    """
+    cloner = _CLONERS.get(cls)
+
+    if cloner is not None:
+        return cloner
+
+    if not dataclasses.is_dataclass(cls):
+        cloner = copy.deepcopy
+    else:
+        names = tuple(f.name for f in dataclasses.fields(cls))
+
+        def clone(entity: Any) -> Any:
+            new: Any = object.__new__(cls)
+            for name in names:
+                object.__setattr__(new, name, _copy_value(getattr(entity, name)))
+            return new
+
+        cloner = clone
+
+    _CLONERS[cls] = cloner
+    return cloner
+
+
+def _clone(entity: Any) -> Any:
+    return _cloner(type(entity))(entity)
+
+
+@lru_cache(maxsize=None)
+def _sort_key(fields: tuple) -> Callable[[Any], Any]:
+    """Sorting key over one or more field paths.
+    For multiple fields the key tuple is built in C code
+    by :func:`operator.attrgetter` instead of a Python
+    generator expression per row."""
+    return operator.attrgetter(*fields)
+
+
+def _getattr_matcher(entity: Any, kwargs: dict) -> bool:
+    return all(getattr(entity, key) == value for key, value in kwargs.items())
+
+
+@lru_cache(maxsize=128)
+def _compile_matcher(keys: tuple) -> Callable[[Any, dict], bool]:
+    """Generate a straight-line matcher for a shape
+    of keyword arguments, e.g. for ``("id", "name")``::
+
+        def m(e, kw): return e.id == kw['id'] and e.name == kw['name']
+
+    Keys that are not plain identifiers (CPython lets such
+    strings through ``**kwargs``) never reach the generated
+    code; they get the getattr-based matcher instead.
+    """
+    if not keys:
+        return lambda entity, kwargs: True
+
+    if not all(key.isidentifier() and not keyword.iskeyword(key) for key in keys):
+        return _getattr_matcher
+
+    src = "def m(e, kw): return " + " and ".join(
+        f"e.{key} == kw[{key!r}]" for key in keys
+    )
+    namespace: dict = {}
+    exec(src, namespace)
+    return namespace["m"]
 
 
 class DictRepo(Generic[T]):
@@ -43,6 +127,40 @@ class DictRepo(Generic[T]):
     id_field = "id"
     """Name of the ID field of an entity."""
 
+    copy_in: Callable = staticmethod(_clone)
+    """Function used to copy entities entering the storage.
+
+    The default clones dataclasses field by field,
+    recursing only into builtin containers.
+    Set it to an identity function in a subclass
+    when entities are immutable (e.g. frozen dataclasses)
+    to skip the copy on the hot path, or to
+    :func:`copy.deepcopy` when entities nest
+    arbitrary mutable objects.
+    """
+
+    copy_out: Callable = staticmethod(_clone)
+    """Function used to copy entities leaving the storage.
+
+    The default clones dataclasses field by field,
+    recursing only into builtin containers.
+    Set it to an identity function in a subclass
+    when entities are immutable (e.g. frozen dataclasses)
+    to skip the copy on the hot path, or to
+    :func:`copy.deepcopy` when entities nest
+    arbitrary mutable objects.
+    """
+
+    indexed_fields: Sequence[str] = ()
+    """Names of entity fields to keep hash indexes for.
+
+    Lookups by equality on an indexed field
+    (keyword arguments of :meth:`get`, :meth:`exists`,
+    :meth:`count`, :meth:`delete` and ``F.eq`` filters
+    of :meth:`get_many`) scan only the matching bucket
+    instead of the whole repository.
+    """
+
     @property
     @abstractmethod
     def key(self) -> str:
@@ -59,6 +177,13 @@ class DictRepo(Generic[T]):
         """
         self.storage = storage
         self.storage[self.key] = self.storage.get(self.key, {})
+        self._indexes: dict[str, dict[Any, set]] = {
+            field: {} for field in self.indexed_fields
+        }
+        self._indexed_data: Optional[dict] = None
+        if self._indexes:
+            self._sync_indexes()
+        self._predicate_cache: dict = {}
 
     @property
     def data(self) -> dict[Any, T]:
@@ -68,17 +193,118 @@ class DictRepo(Generic[T]):
         """
         return self.storage[self.key]
 
+    def _sync_indexes(self) -> None:
+        """Rebuild the indexes if the data dictionary
+        was replaced, e.g. by a rolled back transaction.
+        """
+        data = self.data
+
+        if data is self._indexed_data:
+            return
+
+        for index in self._indexes.values():
+            index.clear()
+
+        for entity in data.values():
+            self._index(entity)
+
+        self._indexed_data = data
+
+    def _index(self, entity: T) -> None:
+        id = getattr(entity, self.id_field)
+
+        for field, index in self._indexes.items():
+            index.setdefault(getattr(entity, field), set()).add(id)
+
+    def _unindex(self, entity: T) -> None:
+        id = getattr(entity, self.id_field)
+
+        for field, index in self._indexes.items():
+            bucket = index.get(getattr(entity, field))
+            if bucket is not None:
+                bucket.discard(id)
+
+    def _candidates(self, kwargs: dict) -> Iterable[T]:
+        """Entities to scan for the given equality conditions.
+        Index buckets of all indexed fields are intersected
+        when possible, otherwise all entities are returned.
+        """
+        if not self._indexes:
+            return self.data.values()
+
+        self._sync_indexes()
+        ids: Optional[set] = None
+
+        for field, value in kwargs.items():
+            index = self._indexes.get(field)
+            if index is not None:
+                try:
+                    bucket = index.get(value, set())
+                except TypeError:
+                    # The value is unhashable, so the index
+                    # cannot answer for it; scan everything
+                    # like the non-indexed path does.
+                    return self.data.values()
+                ids = bucket if ids is None else ids & bucket
+                if not ids:
+                    return ()
+
+        if ids is None:
+            return self.data.values()
+
+        data = self.data
+        return [data[id] for id in ids]
+
+    def _put(self, entity: T) -> None:
+        entity = self.copy_in(entity)
+        id = getattr(entity, self.id_field)
+
+        if self._indexes:
+            self._sync_indexes()
+            old = self.data.get(id)
+            if old is not None:
+                self._unindex(old)
+            self._index(entity)
+
+        self.data[id] = entity
+
     async def add(self, entity: T) -> None:
-        self.data[getattr(entity, self.id_field)] = copy.deepcopy(entity)
+        self._put(entity)
 
     async def add_many(self, entities: Iterable[T]) -> None:
+        # Nothing is actually awaited, so inserting entities
+        # in a plain loop skips a coroutine per entity.
         for entity in entities:
-            await self.add(entity)
+            self._put(entity)
+
+    def _by_id(self, kwargs: dict) -> Optional[T]:
+        """Resolve equality conditions that include the ID field
+        with a single dictionary access, verifying any remaining
+        conditions on the found entity.
+        Returns ``None`` when nothing matches.
+        """
+        entity = self.data.get(kwargs[self.id_field])
+
+        if entity is None:
+            return None
+
+        if len(kwargs) > 1 and not _compile_matcher(tuple(kwargs))(entity, kwargs):
+            return None
+
+        return entity
 
     async def get(self, **kwargs: Any) -> T:
-        for entity in self.data.values():
-            if self._matches(entity, **kwargs):
-                return copy.deepcopy(entity)
+        if self.id_field in kwargs:
+            entity = self._by_id(kwargs)
+            if entity is None:
+                raise NotFound
+            return self.copy_out(entity)
+
+        matches = _compile_matcher(tuple(kwargs))
+
+        for entity in self._candidates(kwargs):
+            if matches(entity, kwargs):
+                return self.copy_out(entity)
 
         raise NotFound
 
@@ -86,7 +312,7 @@ class DictRepo(Generic[T]):
         return await self.get(**kwargs)
 
     def _matches(self, entity: T, **kwargs: Any) -> bool:
-        return all(getattr(entity, k) == v for k, v in kwargs.items())
+        return _compile_matcher(tuple(kwargs))(entity, kwargs)
 
     async def get_many(
         self,
@@ -96,22 +322,57 @@ class DictRepo(Generic[T]):
         page: int = 1,
         offset: int = 0,
     ) -> Iterable[T]:
-        result = self._apply_filters(self.data.values(), filters)
-
-        def sorting_key(x: Any) -> tuple:
-            return tuple(
-                _Desc(self._get_field(x, f[1:]))
-                if f.startswith("-")
-                else self._get_field(x, f)
-                for f in order
-            )
+        entities: Iterable[T] = self.data.values()
+
+        if filters:
+            if self._indexes:
+                entities = self._candidates(
+                    {
+                        f.field: f.value
+                        for f in filters
+                        if f.type == FilterType.EQ and not f.not_
+                    }
+                )
+
+            entities = self._apply_filters(entities, filters)
+
+        if not order:
+            if limit is not None:
+                start = (page - 1) * limit + offset
+                entities = itertools.islice(entities, start, start + limit)
+
+            return list(map(self.copy_out, entities))
+
+        descending = {f.startswith("-") for f in order}
+
+        if limit is not None and len(descending) == 1:
+            # All order keys point the same way, so the page
+            # can be taken with a bounded heap instead of
+            # sorting everything.
+            key = _sort_key(tuple(f.lstrip("-") for f in order))
+            stop = (page - 1) * limit + offset + limit
+            top_k = heapq.nlargest if descending == {True} else heapq.nsmallest
+            result = top_k(stop, entities, key=key)[stop - limit :]
+            return list(map(self.copy_out, result))
 
-        result = sorted(result, key=sorting_key)
+        result = list(entities)
+
+        if len(descending) == 1:
+            result.sort(
+                key=_sort_key(tuple(f.lstrip("-") for f in order)),
+                reverse=descending == {True},
+            )
+        else:
+            for field in reversed(order):
+                if field.startswith("-"):
+                    result.sort(key=_getter(field[1:]), reverse=True)
+                else:
+                    result.sort(key=_getter(field))
 
         if limit is not None:
             result = result[(page - 1) * limit + offset : page * limit + offset]
 
-        return map(copy.deepcopy, result)
+        return list(map(self.copy_out, result))
 
     _FILTERS_MAP = {
         FilterType.EQ: operator.eq,
@@ -145,68 +406,234 @@ class DictRepo(Generic[T]):
         FilterType.HASANY: lambda s, v: any(i in s for i in v),
     }
 
-    def _filter_to_op(self, f: F) -> Callable:
-        op = self._FILTERS_MAP[f.type]
-        if f.not_:
-            return lambda s, v: not op(s, v)
-        return op
+    _LOWERED_FILTERS_MAP = {
+        FilterType.ICONTAINS: lambda s, v: v in s.lower(),
+        FilterType.NICONTAINS: lambda s, v: v not in s.lower(),
+        FilterType.ISTARTSWITH: lambda s, v: s.lower().startswith(v),
+        FilterType.NISTARTSWITH: lambda s, v: not s.lower().startswith(v),
+        FilterType.IENDSWITH: lambda s, v: s.lower().endswith(v),
+        FilterType.NIENDSWITH: lambda s, v: not s.lower().endswith(v),
+    }
+    """Operators for case-insensitive filters
+    that take an already lowercased filter value,
+    so the value is lowered once per query
+    instead of once per row."""
+
+    _FILTERS_TABLE: list = []
+    """Dense version of ``_FILTERS_MAP`` indexed
+    by ``FilterType`` value, filled in after the class body."""
+
+    _LOWERED_FILTERS_TABLE: list = []
+    """Dense version of ``_LOWERED_FILTERS_MAP`` indexed
+    by ``FilterType`` value, filled in after the class body."""
+
+    _REGEX_FLAGS = {
+        FilterType.MATCHES: 0,
+        FilterType.NMATCHES: 0,
+        FilterType.IMATCHES: re.IGNORECASE,
+        FilterType.NIMATCHES: re.IGNORECASE,
+    }
 
-    def _get_field(self, obj: Any, field: str) -> Any:
-        return reduce(lambda x, y: getattr(x, y), field.split("."), obj)
+    def _compile_regex_filter(self, filter_: F) -> Callable[[T], bool]:
+        compiled = filter_.compiled
+        pattern = (
+            compiled
+            if compiled is not None
+            else re.compile(filter_.value, self._REGEX_FLAGS[filter_.type])
+        )
 
-    def _apply_filters(self, entities: Iterable[T], filters: Sequence[F]) -> list[T]:
-        result = list(entities)
+        negate = filter_.type in (FilterType.NMATCHES, FilterType.NIMATCHES)
+
+        if filter_.not_:
+            negate = not negate
+
+        getter = _getter(filter_.field)
+
+        if negate:
+            return lambda x: not pattern.match(getter(x))
+
+        return lambda x: bool(pattern.match(getter(x)))
+
+    def _compile_filter(self, filter_: F) -> Callable[[T], bool]:
+        """Compile a filter into a predicate over a single entity."""
+        if filter_.type in (FilterType.OR, FilterType.AND):
+            checks = [self._compile_filter(ff) for ff in filter_.value]
+            combine = any if filter_.type == FilterType.OR else all
 
-        for f in filters:
-            result = [x for x in result if self._check(f, x)]
+            if filter_.not_:
+                return lambda x: not combine(c(x) for c in checks)
 
-        return result
+            return lambda x: combine(c(x) for c in checks)
 
-    def _check(self, filter_: F, entity: T) -> bool:
-        if filter_.type == FilterType.OR:
-            return any(self._check(ff, entity) for ff in filter_.value)
-        elif filter_.type == FilterType.AND:
-            return all(self._check(ff, entity) for ff in filter_.value)
+        if filter_.type in self._REGEX_FLAGS:
+            return self._compile_regex_filter(filter_)
+
+        op = self._LOWERED_FILTERS_TABLE[filter_.type]
+
+        if op is not None:
+            value = filter_.value.lower()
         else:
-            op = self._filter_to_op(filter_)
-            return op(self._get_field(entity, filter_.field), filter_.value)
+            op = self._FILTERS_TABLE[filter_.type]
+            value = filter_.value
+
+            if filter_.type in (FilterType.IN, FilterType.NIN) and isinstance(
+                value, (list, tuple)
+            ):
+                # Hash lookups instead of scanning the sequence
+                # for every entity.
+                try:
+                    value = frozenset(value)
+                except TypeError:
+                    pass
+
+        if filter_.not_:
+            positive = op
+            op = lambda s, v: not positive(s, v)
+
+        getter = _getter(filter_.field)
+        return lambda x: op(getter(x), value)
+
+    def _compile_filters(self, filters: Sequence[F]) -> Callable[[T], bool]:
+        """Fuse a sequence of filters into a single predicate,
+        so that filtering makes one pass over the entities
+        instead of one pass per filter.
+
+        Compiled predicates are cached, so queries repeated
+        with the same filters skip compilation entirely.
+        """
+        try:
+            key = tuple(map(_filter_key, filters))
+        except TypeError:
+            return self._fuse_filters(filters)
+
+        predicate = self._predicate_cache.get(key)
+
+        if predicate is None:
+            predicate = self._fuse_filters(filters)
+
+            if len(self._predicate_cache) >= 128:
+                self._predicate_cache.clear()
+
+            self._predicate_cache[key] = predicate
+
+        return predicate
+
+    def _fuse_filters(self, filters: Sequence[F]) -> Callable[[T], bool]:
+        checks = [self._compile_filter(f) for f in filters]
+
+        if len(checks) == 1:
+            return checks[0]
+
+        return lambda x: all(c(x) for c in checks)
+
+    def _apply_filters(
+        self, entities: Iterable[T], filters: Sequence[F]
+    ) -> Iterable[T]:
+        """Lazily select entities matching the filters,
+        so that consumers which only iterate once, count
+        or short-circuit do not pay for a full list.
+        """
+        if not filters:
+            return entities
+
+        return filter(self._compile_filters(filters), entities)
 
     async def get_first(
         self, filters: Sequence[F] = (), order: Sequence[str] = ()
     ) -> T:
+        if not order:
+            entities = self._apply_filters(self.data.values(), filters)
+            entity = next(iter(entities), None)
+
+            if entity is None:
+                raise NotFound
+
+            return self.copy_out(entity)
+
         try:
             return list(await self.get_many(filters, order=order, limit=1))[0]
         except IndexError:
             raise NotFound
 
     async def update(self, entity: T) -> None:
+        entity = self.copy_in(entity)
         id = getattr(entity, self.id_field)
+
         if id not in self.data:
             raise NotFound
-        self.data[id] = copy.deepcopy(entity)
+
+        if self._indexes:
+            self._sync_indexes()
+            self._unindex(self.data[id])
+            self._index(entity)
+
+        self.data[id] = entity
 
     async def delete(self, **kwargs: Any) -> None:
-        for id, item in list(self.data.items()):
-            if self._matches(item, **kwargs):
-                del self.data[id]
+        if self.id_field in kwargs:
+            entity = self._by_id(kwargs)
+            if entity is not None:
+                if self._indexes:
+                    self._sync_indexes()
+                    self._unindex(entity)
+                del self.data[kwargs[self.id_field]]
+            return
+
+        matches = _compile_matcher(tuple(kwargs))
+        to_remove = [
+            entity for entity in self._candidates(kwargs) if matches(entity, kwargs)
+        ]
+        data = self.data
+
+        for entity in to_remove:
+            if self._indexes:
+                self._unindex(entity)
+            del data[getattr(entity, self.id_field)]
 
     async def exists(self, **kwargs: Any) -> bool:
-        return any(self._matches(entity, **kwargs) for entity in self.data.values())
+        if self.id_field in kwargs:
+            return self._by_id(kwargs) is not None
+
+        matches = _compile_matcher(tuple(kwargs))
+        return any(matches(entity, kwargs) for entity in self._candidates(kwargs))
 
     async def count(self, **kwargs: Any) -> int:
         if kwargs:
+            if self.id_field in kwargs:
+                return int(self._by_id(kwargs) is not None)
+
+            matches = _compile_matcher(tuple(kwargs))
             return sum(
-                1 for entity in self.data.values() if self._matches(entity, **kwargs)
+                1 for entity in self._candidates(kwargs) if matches(entity, kwargs)
             )
         return len(self.data)
 
     async def count_filtered(self, filter_: F) -> int:
-        return sum(1 for _ in await self.get_many([filter_]))
+        return sum(1 for _ in self._apply_filters(self.data.values(), (filter_,)))
+
+
+def _dispatch_table(mapping: dict) -> list:
+    table: list = [None] * (len(FilterType) + 1)
+
+    for filter_type, op in mapping.items():
+        table[filter_type.value] = op
+
+    return table
+
+
+DictRepo._FILTERS_TABLE = _dispatch_table(DictRepo._FILTERS_MAP)
+DictRepo._LOWERED_FILTERS_TABLE = _dispatch_table(DictRepo._LOWERED_FILTERS_MAP)
 
 
 class DictTransactionManager:
     """Implementation of the :class:`misery.TransactionManager` protocol.
     It uses a dictionary to store entities.
+
+    The snapshot taken on entering a transaction is shallow:
+    only the storage dictionary and its nested collections
+    are copied, not the entities. This is enough for rollback
+    because repositories never modify stored entities in place,
+    they replace them on every write.
     """
 
     def __init__(self, storage: dict) -> None:
@@ -214,7 +641,7 @@ class DictTransactionManager:
         self._copy: dict = {}
 
     async def __aenter__(self) -> None:
-        self._copy = copy.deepcopy(self._storage)
+        self._copy = {key: dict(data) for key, data in self._storage.items()}
 
     async def __aexit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
         if exc is not None:
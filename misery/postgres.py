@@ -1,4 +1,3 @@
-import dataclasses
 import itertools
 import typing
 from abc import abstractmethod
@@ -6,11 +5,14 @@ from contextvars import ContextVar
 from enum import Enum
 from typing import (
     Any,
+    Callable,
+    Dict,
     Generic,
     Iterable,
     Optional,
     Protocol,
     Sequence,
+    Tuple,
     TypeVar,
     Union,
 )
@@ -38,6 +40,9 @@ from pypika.terms import (  # type: ignore
 from .core import F
 from .core import FilterType
 from .core import NotFound
+from .core import _field_names
+from .core import _filter_key
+from .core import _wildcard
 
 
 T = TypeVar("T")
@@ -90,6 +95,85 @@ class _InetIn(BasicCriterion):
         )
 
 
+_FILTER_DISPATCH: Dict[FilterType, Callable[[Any, Any], Criterion]] = {
+    FilterType.EQ: lambda c, v: c.isnull() if v is None else c == v,
+    FilterType.NEQ: lambda c, v: c.notnull() if v is None else c != v,
+    FilterType.IEQ: lambda c, v: c.isnull() if v is None else c.ilike(v),
+    FilterType.INEQ: lambda c, v: c.notnull() if v is None else c.not_ilike(v),
+    FilterType.LT: lambda c, v: c < v,
+    FilterType.GT: lambda c, v: c > v,
+    FilterType.LTE: lambda c, v: c <= v,
+    FilterType.GTE: lambda c, v: c >= v,
+    FilterType.STARTSWITH: lambda c, v: c.like(_wildcard("", v, "%")),
+    FilterType.NSTARTSWITH: lambda c, v: c.not_like(_wildcard("", v, "%")),
+    FilterType.ENDSWITH: lambda c, v: c.like(_wildcard("%", v, "")),
+    FilterType.NENDSWITH: lambda c, v: c.not_like(_wildcard("%", v, "")),
+    FilterType.ISTARTSWITH: lambda c, v: c.ilike(_wildcard("", v, "%")),
+    FilterType.NISTARTSWITH: lambda c, v: c.not_ilike(_wildcard("", v, "%")),
+    FilterType.IENDSWITH: lambda c, v: c.ilike(_wildcard("%", v, "")),
+    FilterType.NIENDSWITH: lambda c, v: c.not_ilike(_wildcard("%", v, "")),
+    FilterType.CONTAINS: lambda c, v: c.like(_wildcard("%", v, "%")),
+    FilterType.NCONTAINS: lambda c, v: c.not_like(_wildcard("%", v, "%")),
+    FilterType.ICONTAINS: lambda c, v: c.ilike(_wildcard("%", v, "%")),
+    FilterType.NICONTAINS: lambda c, v: c.not_ilike(_wildcard("%", v, "%")),
+    FilterType.IN: lambda c, v: c.isin(v),
+    FilterType.NIN: lambda c, v: c.notin(v),
+    FilterType.MATCHES: _Regexp,
+    FilterType.NMATCHES: _NotRegexp,
+    FilterType.IMATCHES: _IRegexp,
+    FilterType.NIMATCHES: _NotIRegexp,
+    FilterType.IPIN: _InetIn,
+    FilterType.NIPIN: lambda c, v: Not(_InetIn(c, v)),
+    FilterType.HASANY: _Overlap,
+}
+
+_FILTER_DISPATCH_TABLE: list = [None] * (len(FilterType) + 1)
+
+for _type, _make in _FILTER_DISPATCH.items():
+    _FILTER_DISPATCH_TABLE[_type] = _make
+
+
+_PARAM_DISPATCH: Dict[FilterType, Callable[[Any, Parameter], Criterion]] = {
+    **{
+        t: make
+        for t, make in _FILTER_DISPATCH.items()
+        if t not in (FilterType.IN, FilterType.NIN, FilterType.HASANY)
+    },
+    FilterType.STARTSWITH: lambda c, p: c.like(p),
+    FilterType.NSTARTSWITH: lambda c, p: c.not_like(p),
+    FilterType.ISTARTSWITH: lambda c, p: c.ilike(p),
+    FilterType.NISTARTSWITH: lambda c, p: c.not_ilike(p),
+    FilterType.ENDSWITH: lambda c, p: c.like(p),
+    FilterType.NENDSWITH: lambda c, p: c.not_like(p),
+    FilterType.IENDSWITH: lambda c, p: c.ilike(p),
+    FilterType.NIENDSWITH: lambda c, p: c.not_ilike(p),
+    FilterType.CONTAINS: lambda c, p: c.like(p),
+    FilterType.NCONTAINS: lambda c, p: c.not_like(p),
+    FilterType.ICONTAINS: lambda c, p: c.ilike(p),
+    FilterType.NICONTAINS: lambda c, p: c.not_ilike(p),
+}
+"""Criterion builders for filters whose value can be bound
+as a ``$n`` parameter. The wildcard family takes a plain
+placeholder because the ``%`` signs move into the bound value.
+IN, NIN and HASANY are absent: their sequence values render
+inline through the regular dispatch table."""
+
+_PARAM_TRANSFORMS: Dict[FilterType, Callable[[Any], Any]] = {
+    FilterType.STARTSWITH: lambda v: f"{v}%",
+    FilterType.NSTARTSWITH: lambda v: f"{v}%",
+    FilterType.ISTARTSWITH: lambda v: f"{v}%",
+    FilterType.NISTARTSWITH: lambda v: f"{v}%",
+    FilterType.ENDSWITH: lambda v: f"%{v}",
+    FilterType.NENDSWITH: lambda v: f"%{v}",
+    FilterType.IENDSWITH: lambda v: f"%{v}",
+    FilterType.NIENDSWITH: lambda v: f"%{v}",
+    FilterType.CONTAINS: lambda v: f"%{v}%",
+    FilterType.NCONTAINS: lambda v: f"%{v}%",
+    FilterType.ICONTAINS: lambda v: f"%{v}%",
+    FilterType.NICONTAINS: lambda v: f"%{v}%",
+}
+
+
 class PostgresRepo(Generic[T]):
     """Implementation of the :class:`misery.Repo` protocol
     that uses asyncpg to communicate with PostgreSQL.
@@ -98,6 +182,8 @@ class PostgresRepo(Generic[T]):
     id_field = "id"
     """Name of the ID field of an entity."""
 
+    _entity_type: type
+
     @property
     @abstractmethod
     def table(self) -> Table:
@@ -106,11 +192,34 @@ class PostgresRepo(Generic[T]):
         """
         ...
 
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+
+        for base in cls.__dict__.get("__orig_bases__", ()):
+            args = typing.get_args(base)
+            if args:
+                cls._entity_type = args[0]
+                break
+
     def __init__(self, conn: Union[Connection, Pool]) -> None:
         """:param conn: Connection or pool that
         will be used for interaction with the database.
         """
         self._conn = conn
+        self._sql_cache: Dict[tuple, str] = {}
+        self._criterion_cache: Dict[tuple, Criterion] = {}
+        self._col_cache: Dict[str, Any] = {}
+
+    def _col(self, name: str) -> Any:
+        """Column of the main table, cached by name
+        to avoid allocating an identical field object
+        for every filter of every query.
+        """
+        try:
+            return self._col_cache[name]
+        except KeyError:
+            column = self._col_cache[name] = self.table[name]
+            return column
 
     @property
     def conn(self) -> Union[Connection, Pool]:
@@ -132,10 +241,6 @@ class PostgresRepo(Generic[T]):
         """
         return PostgreSQLQuery.from_(self.table).select("*")
 
-    @property
-    def _entity_type(self) -> type:
-        return typing.get_args(self.__orig_bases__[0])[0]  # type: ignore
-
     def load(self, record: dict) -> T:
         """Map a database record to an entity.
 
@@ -148,34 +253,75 @@ class PostgresRepo(Generic[T]):
 
         Override this method if needed.
         """
-        return dataclasses.asdict(entity)
+        return {name: getattr(entity, name) for name in _field_names(type(entity))}
 
-    async def fetch_one(self, query: PostgreSQLQuery) -> T:
+    async def fetch_one(self, query: PostgreSQLQuery, *args: Any) -> T:
         """Find a record in the database
         and map it to an entity.
         """
-        data = await self.conn.fetchrow(str(query))
+        data = await self.conn.fetchrow(str(query), *args)
 
         if data is None:
             raise NotFound
 
         return self.load(dict(data))
 
-    async def fetch_many(self, query: PostgreSQLQuery) -> Iterable[T]:
+    async def fetch_many(self, query: PostgreSQLQuery, *args: Any) -> Iterable[T]:
         """Find multiple records in the database
         and map them to entities.
         """
-        records = await self.conn.fetch(str(query))
-        return map(lambda x: self.load(dict(x)), records)
+        records = await self.conn.fetch(str(query), *args)
+        load = self.load
+        return [load(dict(record)) for record in records]
+
+    def _lookup_sql(self, method: str, keys: Tuple[str, ...]) -> str:
+        """SQL for a lookup by field-value pairs with a ``$n``
+        placeholder per field, cached by the tuple of field names
+        so that repeated lookups of the same shape skip
+        query building and stringification.
+        """
+        try:
+            return self._sql_cache[(method, keys)]
+        except KeyError:
+            pass
+
+        if method == "get":
+            query = self.query.limit(1)
+        elif method == "get_for_update":
+            query = (
+                PostgreSQLQuery.from_(self.table)
+                .select(self.table[self.id_field])
+                .for_update()
+            )
+        elif method == "exists":
+            query = PostgreSQLQuery.from_(self.table).select(1).limit(1)
+        elif method == "count":
+            query = PostgreSQLQuery.from_(self.table).select(fn.Count("*"))
+        else:
+            query = PostgreSQLQuery.from_(self.table).delete()
+
+        for n, k in enumerate(keys, start=1):
+            query = query.where(self.table[k] == Parameter(f"${n}"))
+
+        sql = str(query)
+        self._sql_cache[(method, keys)] = sql
+        return sql
 
     async def add(self, entity: T) -> None:
         data = self.dump(entity)
-        query = (
-            PostgreSQLQuery.into(self.table)
-            .columns(*data.keys())
-            .insert(*data.values())
-        )
-        await self.conn.execute(str(query))
+        keys = tuple(data)
+
+        try:
+            sql = self._sql_cache[("add", keys)]
+        except KeyError:
+            query = (
+                PostgreSQLQuery.into(self.table)
+                .columns(*keys)
+                .insert(*[Parameter(f"${n}") for n in range(1, len(keys) + 1)])
+            )
+            sql = self._sql_cache[("add", keys)] = str(query)
+
+        await self.conn.execute(sql, *data.values())
         await self.after_add(entity)
 
     async def after_add(self, entity: T) -> None:
@@ -191,39 +337,38 @@ class PostgresRepo(Generic[T]):
         first = next(ientities)
         data = self.dump(first)
 
+        records = itertools.chain(
+            [tuple(data.values())],
+            (tuple(self.dump(x).values()) for x in ientities),
+        )
+
+        copy_records = getattr(self.conn, "copy_records_to_table", None)
+
+        if copy_records is not None and getattr(self.table, "_schema", None) is None:
+            # COPY streams all rows in one round trip instead
+            # of one executemany binding per row.
+            await copy_records(
+                self.table.get_table_name(),
+                records=records,
+                columns=tuple(data.keys()),
+            )
+            return
+
         query = (
             PostgreSQLQuery.into(self.table)
             .columns(*data.keys())
             .insert(*[Parameter(f"${n}") for n in range(1, len(data) + 1)])
         )
 
-        await self.conn.executemany(
-            str(query),
-            itertools.chain(
-                [tuple(data.values())],
-                (tuple(self.dump(x).values()) for x in ientities),
-            ),
-        )
+        await self.conn.executemany(str(query), records)
 
     async def get(self, **kwargs: Any) -> T:
-        query = self.query.limit(1)
-
-        for k, v in kwargs.items():
-            query = query.where(self.table[k] == v)
-
-        return await self.fetch_one(query)
+        sql = self._lookup_sql("get", tuple(kwargs))
+        return await self.fetch_one(sql, *kwargs.values())
 
     async def get_for_update(self, **kwargs: Any) -> T:
-        query = (
-            PostgreSQLQuery.from_(self.table)
-            .select(self.table[self.id_field])
-            .for_update()
-        )
-
-        for k, v in kwargs.items():
-            query = query.where(self.table[k] == v)
-
-        await self.conn.fetchrow(str(query))
+        sql = self._lookup_sql("get_for_update", tuple(kwargs))
+        await self.conn.fetchrow(sql, *kwargs.values())
         return await self.get(**kwargs)
 
     async def get_many(
@@ -234,6 +379,53 @@ class PostgresRepo(Generic[T]):
         page: int = 1,
         offset: int = 0,
     ) -> Iterable[T]:
+        try:
+            shape = tuple(self._filter_shape(f) for f in filters)
+        except KeyError:
+            shape = None
+
+        if shape is not None:
+            key = ("get_many", shape, tuple(order), limit, page, offset)
+            params: list = []
+
+            try:
+                sql = self._sql_cache[key]
+            except KeyError:
+                query = self._base_query(order, limit, page, offset)
+
+                if filters:
+                    query = query.where(
+                        Criterion.all(
+                            [self._parametrized_criterion(f, params) for f in filters]
+                        )
+                    )
+
+                if len(self._sql_cache) >= 512:
+                    self._sql_cache.clear()
+
+                sql = self._sql_cache[key] = str(query)
+            else:
+                for f in filters:
+                    self._collect_params(f, params)
+
+            return await self.fetch_many(sql, *params)
+
+        query = self._base_query(order, limit, page, offset)
+
+        if filters:
+            query = query.where(
+                Criterion.all([self._cached_criterion(f) for f in filters])
+            )
+
+        return await self.fetch_many(query)
+
+    def _base_query(
+        self,
+        order: Sequence[str],
+        limit: Optional[int],
+        page: int,
+        offset: int,
+    ) -> PostgreSQLQuery:
         query = self.query
 
         if limit is not None:
@@ -247,90 +439,86 @@ class PostgresRepo(Generic[T]):
             else:
                 query = query.orderby(field)
 
-        for f in filters:
-            criterion = self._filter_to_criterion(f)
-            query = query.where(criterion)
+        return query
 
-        return await self.fetch_many(query)
+    def _filter_shape(self, f: F) -> tuple:
+        """Structural signature of a filter: types, fields
+        and negations without the values.
+        Raises ``KeyError`` for filters whose value cannot
+        be bound as a parameter.
+        """
+        if f.type == FilterType.OR or f.type == FilterType.AND:
+            return (f.type, f.not_, tuple(self._filter_shape(ff) for ff in f.value))
+
+        if f.value is None or f.type not in _PARAM_DISPATCH:
+            raise KeyError(f.type)
+
+        return (f.type, f.field, f.not_)
+
+    def _parametrized_criterion(self, f: F, params: list) -> Criterion:
+        """Compile a filter to a criterion with ``$n``
+        placeholders, appending the bound values to ``params``
+        in traversal order.
+        """
+        if f.type == FilterType.OR or f.type == FilterType.AND:
+            combine = Criterion.any if f.type == FilterType.OR else Criterion.all
+            criterion = combine(
+                [self._parametrized_criterion(ff, params) for ff in f.value]
+            )
+        else:
+            transform = _PARAM_TRANSFORMS.get(f.type)
+            params.append(transform(f.value) if transform else f.value)
+            criterion = _PARAM_DISPATCH[f.type](
+                self._col(f.field), Parameter(f"${len(params)}")
+            )
+
+        if f.not_:
+            return Not(criterion)
+
+        return criterion
+
+    def _collect_params(self, f: F, params: list) -> None:
+        """Gather bound values in the same order
+        :meth:`_parametrized_criterion` would emit them,
+        for calls that hit the SQL cache.
+        """
+        if f.type == FilterType.OR or f.type == FilterType.AND:
+            for ff in f.value:
+                self._collect_params(ff, params)
+        else:
+            transform = _PARAM_TRANSFORMS.get(f.type)
+            params.append(transform(f.value) if transform else f.value)
+
+    def _cached_criterion(self, f: F) -> Criterion:
+        """Compile a filter to a criterion, reusing
+        the result of an earlier compilation
+        of an identical filter.
+        """
+        try:
+            key = _filter_key(f)
+        except TypeError:
+            return self._filter_to_criterion(f)
+
+        try:
+            return self._criterion_cache[key]
+        except KeyError:
+            pass
+
+        if len(self._criterion_cache) >= 128:
+            self._criterion_cache.clear()
+
+        criterion = self._criterion_cache[key] = self._filter_to_criterion(f)
+        return criterion
 
     def _filter_to_criterion(self, f: F) -> Criterion:
-        column = self.table[f.field]
         criterion: Any = None
 
         if f.type == FilterType.OR:
             criterion = Criterion.any([self._filter_to_criterion(ff) for ff in f.value])
         elif f.type == FilterType.AND:
             criterion = Criterion.all([self._filter_to_criterion(ff) for ff in f.value])
-        elif f.type == FilterType.EQ:
-            if f.value is None:
-                criterion = column.isnull()
-            else:
-                criterion = column == f.value
-        elif f.type == FilterType.NEQ:
-            if f.value is None:
-                criterion = column.notnull()
-            else:
-                criterion = column != f.value
-        elif f.type == FilterType.IEQ:
-            if f.value is None:
-                criterion = column.isnull()
-            else:
-                criterion = column.ilike(f.value)
-        elif f.type == FilterType.INEQ:
-            if f.value is None:
-                criterion = column.notnull()
-            else:
-                criterion = column.not_ilike(f.value)
-        elif f.type == FilterType.LT:
-            criterion = column < f.value
-        elif f.type == FilterType.GT:
-            criterion = column > f.value
-        elif f.type == FilterType.LTE:
-            criterion = column <= f.value
-        elif f.type == FilterType.GTE:
-            criterion = column >= f.value
-        elif f.type == FilterType.STARTSWITH:
-            criterion = column.like(f"{f.value}%")
-        elif f.type == FilterType.NSTARTSWITH:
-            criterion = column.not_like(f"{f.value}%")
-        elif f.type == FilterType.ENDSWITH:
-            criterion = column.like(f"%{f.value}")
-        elif f.type == FilterType.NENDSWITH:
-            criterion = column.not_like(f"%{f.value}")
-        elif f.type == FilterType.ISTARTSWITH:
-            criterion = column.ilike(f"{f.value}%")
-        elif f.type == FilterType.NISTARTSWITH:
-            criterion = column.not_ilike(f"{f.value}%")
-        elif f.type == FilterType.IENDSWITH:
-            criterion = column.ilike(f"%{f.value}")
-        elif f.type == FilterType.NIENDSWITH:
-            criterion = column.not_ilike(f"%{f.value}")
-        elif f.type == FilterType.CONTAINS:
-            criterion = column.like(f"%{f.value}%")
-        elif f.type == FilterType.NCONTAINS:
-            criterion = column.not_like(f"%{f.value}%")
-        elif f.type == FilterType.ICONTAINS:
-            criterion = column.ilike(f"%{f.value}%")
-        elif f.type == FilterType.NICONTAINS:
-            criterion = column.not_ilike(f"%{f.value}%")
-        elif f.type == FilterType.IN:
-            criterion = column.isin(f.value)
-        elif f.type == FilterType.NIN:
-            criterion = column.notin(f.value)
-        elif f.type == FilterType.MATCHES:
-            criterion = _Regexp(column, f.value)
-        elif f.type == FilterType.NMATCHES:
-            criterion = _NotRegexp(column, f.value)
-        elif f.type == FilterType.IMATCHES:
-            criterion = _IRegexp(column, f.value)
-        elif f.type == FilterType.NIMATCHES:
-            criterion = _NotIRegexp(column, f.value)
-        elif f.type == FilterType.IPIN:
-            criterion = _InetIn(column, f.value)
-        elif f.type == FilterType.NIPIN:
-            criterion = Not(_InetIn(column, f.value))
-        elif f.type == FilterType.HASANY:
-            criterion = _Overlap(column, f.value)
+        else:
+            criterion = _FILTER_DISPATCH_TABLE[f.type](self._col(f.field), f.value)
 
         if f.not_:
             return Not(criterion)
@@ -340,20 +528,33 @@ class PostgresRepo(Generic[T]):
     async def get_first(
         self, filters: Sequence[F] = (), order: Sequence[str] = ()
     ) -> T:
-        try:
-            return list(await self.get_many(filters, order=order, limit=1))[0]
-        except IndexError:
+        entity = next(iter(await self.get_many(filters, order=order, limit=1)), None)
+
+        if entity is None:
             raise NotFound
 
+        return entity
+
     async def update(self, entity: T) -> None:
-        query = PostgreSQLQuery.update(self.table)
         record = self.dump(entity)
+        keys = tuple(record)
+
+        try:
+            sql = self._sql_cache[("update", keys)]
+        except KeyError:
+            query = PostgreSQLQuery.update(self.table)
+
+            for n, k in enumerate(keys, start=1):
+                query = query.set(k, Parameter(f"${n}"))
 
-        for k, v in record.items():
-            query = query.set(k, v)
+            query = query.where(
+                self._col(self.id_field) == Parameter(f"${len(keys) + 1}")
+            )
+            sql = self._sql_cache[("update", keys)] = str(query)
 
-        query = query.where(self.table[self.id_field] == getattr(entity, self.id_field))
-        result = await self.conn.execute(str(query))
+        result = await self.conn.execute(
+            sql, *record.values(), getattr(entity, self.id_field)
+        )
 
         if result == "UPDATE 0":
             raise NotFound
@@ -369,32 +570,20 @@ class PostgresRepo(Generic[T]):
         pass
 
     async def delete(self, **kwargs: Any) -> None:
-        query = PostgreSQLQuery.from_(self.table).delete()
-
-        for k, v in kwargs.items():
-            query = query.where(self.table[k] == v)
-
-        await self.conn.execute(str(query))
+        sql = self._lookup_sql("delete", tuple(kwargs))
+        await self.conn.execute(sql, *kwargs.values())
 
     async def exists(self, **kwargs: Any) -> bool:
-        query = PostgreSQLQuery.from_(self.table).select(1).limit(1)
-
-        for k, v in kwargs.items():
-            query = query.where(self.table[k] == v)
-
-        data = await self.conn.fetchval(str(query))
+        sql = self._lookup_sql("exists", tuple(kwargs))
+        data = await self.conn.fetchval(sql, *kwargs.values())
         return data is not None
 
     async def count(self, **kwargs: Any) -> int:
-        query = PostgreSQLQuery.from_(self.table).select(fn.Count("*"))
-
-        for k, v in kwargs.items():
-            query = query.where(self.table[k] == v)
-
-        return await self.conn.fetchval(str(query))
+        sql = self._lookup_sql("count", tuple(kwargs))
+        return await self.conn.fetchval(sql, *kwargs.values())
 
     async def count_filtered(self, filter_: F) -> int:
-        criterion = self._filter_to_criterion(filter_)
+        criterion = self._cached_criterion(filter_)
         query = self.query.where(criterion).distinct()
         query = PostgreSQLQuery.from_(query).select(fn.Count(1))
         return await self.conn.fetchval(str(query))
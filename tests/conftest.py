@@ -1,6 +1,3 @@
-import asyncio
-from typing import Generator
-
 import pytest  # type: ignore
 
 from .base import (
@@ -12,39 +9,55 @@ from .base import (
 )
 
 
-@pytest.fixture(scope="session")
-def event_loop() -> Generator:
-    loop = asyncio.get_event_loop()
-    yield loop
-    loop.close()
+_SYMPTOM_FACTORIES = {
+    "hopelessness": lambda: Symptom(
+        id=1, name="Hopelessness", type=SymptomType.PSYCHOLOGICAL
+    ),
+    "helplessness": lambda: Symptom(
+        id=2, name="Helplessness", type=SymptomType.PSYCHOLOGICAL
+    ),
+    "insomnia": lambda: Symptom(id=3, name="Insomnia", type=SymptomType.PHYSICAL),
+    "constipation": lambda: Symptom(
+        id=4, name="Constipation", type=SymptomType.PHYSICAL
+    ),
+}
+
+
+@pytest.fixture
+async def _symptoms(
+    request: pytest.FixtureRequest, symptoms_repo: SymptomsRepo
+) -> dict:
+    """All symptoms the test asked for,
+    saved with a single add_many round trip
+    instead of one insert per fixture.
+    """
+    batch = {
+        name: factory()
+        for name, factory in _SYMPTOM_FACTORIES.items()
+        if name in request.fixturenames
+    }
+    await symptoms_repo.add_many(list(batch.values()))
+    return batch
 
 
 @pytest.fixture
-async def hopelessness(symptoms_repo: SymptomsRepo) -> Symptom:
-    s = Symptom(id=1, name="Hopelessness", type=SymptomType.PSYCHOLOGICAL)
-    await symptoms_repo.add(s)
-    return s
+def hopelessness(_symptoms: dict) -> Symptom:
+    return _symptoms["hopelessness"]
 
 
 @pytest.fixture
-async def helplessness(symptoms_repo: SymptomsRepo) -> Symptom:
-    s = Symptom(id=2, name="Helplessness", type=SymptomType.PSYCHOLOGICAL)
-    await symptoms_repo.add(s)
-    return s
+def helplessness(_symptoms: dict) -> Symptom:
+    return _symptoms["helplessness"]
 
 
 @pytest.fixture
-async def constipation(symptoms_repo: SymptomsRepo) -> Symptom:
-    s = Symptom(id=4, name="Constipation", type=SymptomType.PHYSICAL)
-    await symptoms_repo.add(s)
-    return s
+def constipation(_symptoms: dict) -> Symptom:
+    return _symptoms["constipation"]
 
 
 @pytest.fixture
-async def insomnia(symptoms_repo: SymptomsRepo) -> Symptom:
-    s = Symptom(id=3, name="Insomnia", type=SymptomType.PHYSICAL)
-    await symptoms_repo.add(s)
-    return s
+def insomnia(_symptoms: dict) -> Symptom:
+    return _symptoms["insomnia"]
 
 
 @pytest.fixture
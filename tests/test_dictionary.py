@@ -77,80 +77,80 @@ async def test_get_many(
     symptoms_repo: SymptomsRepo, hopelessness: Symptom, helplessness: Symptom
 ) -> None:
     symptoms = list(await symptoms_repo.get_many())
-    assert symptoms == [hopelessness, helplessness]
-
-
-@pytest.mark.parametrize(
-    "filters, names",
-    [
-        ([F.eq("name", "Insomnia")], {"Insomnia"}),
-        ([F.neq("name", "Insomnia")], {"Hopelessness", "Helplessness", "Constipation"}),
-        ([~F.eq("name", "Insomnia")], {"Hopelessness", "Helplessness", "Constipation"}),
-        ([F.contains("name", "les")], {"Hopelessness", "Helplessness"}),
-        ([F.contains("name", "LES")], set()),
-        ([F.ncontains("name", "les")], {"Insomnia", "Constipation"}),
-        (
-            [F.ncontains("name", "LES")],
-            {"Hopelessness", "Helplessness", "Insomnia", "Constipation"},
-        ),
-        ([F.icontains("name", "LES")], {"Hopelessness", "Helplessness"}),
-        ([F.nicontains("name", "LES")], {"Insomnia", "Constipation"}),
-        ([F.startswith("name", "H")], {"Hopelessness", "Helplessness"}),
-        ([F.startswith("name", "h")], set()),
-        ([F.nstartswith("name", "H")], {"Insomnia", "Constipation"}),
-        (
-            [F.nstartswith("name", "h")],
-            {"Hopelessness", "Helplessness", "Insomnia", "Constipation"},
-        ),
-        ([F.istartswith("name", "h")], {"Hopelessness", "Helplessness"}),
-        ([F.nistartswith("name", "h")], {"Insomnia", "Constipation"}),
-        ([F.endswith("name", "ness")], {"Hopelessness", "Helplessness"}),
-        ([F.endswith("name", "NESS")], set()),
-        ([F.nendswith("name", "ness")], {"Insomnia", "Constipation"}),
-        (
-            [F.nendswith("name", "NESS")],
-            {"Hopelessness", "Helplessness", "Insomnia", "Constipation"},
-        ),
-        ([F.iendswith("name", "NESS")], {"Hopelessness", "Helplessness"}),
-        ([F.niendswith("name", "NESS")], {"Insomnia", "Constipation"}),
-        ([F.matches("name", r"^H.*s$")], {"Hopelessness", "Helplessness"}),
-        ([F.matches("name", r"^h.*s$")], set()),
-        ([F.nmatches("name", r"^H.*s$")], {"Insomnia", "Constipation"}),
-        (
-            [F.nmatches("name", r"^h.*s$")],
-            {"Hopelessness", "Helplessness", "Insomnia", "Constipation"},
-        ),
-        ([F.imatches("name", r"^h.*s$")], {"Hopelessness", "Helplessness"}),
-        ([F.nimatches("name", r"^h.*s$")], {"Insomnia", "Constipation"}),
-        ([F.in_("name", ("Insomnia", "Constipation"))], {"Insomnia", "Constipation"}),
-        (
-            [F.nin("name", ("Insomnia", "Constipation"))],
-            {"Hopelessness", "Helplessness"},
-        ),
-        ([F.lt("id", 2)], {"Hopelessness"}),
-        ([F.lte("id", 2)], {"Hopelessness", "Helplessness"}),
-        ([F.gt("id", 3)], {"Constipation"}),
-        ([F.gte("id", 3)], {"Insomnia", "Constipation"}),
-        (
-            [
-                F.or_(
-                    F.or_(F.startswith("name", "I"), F.endswith("name", "n")),
-                    F.eq("name", "Helplessness"),
-                )
-            ],
-            {"Constipation", "Insomnia", "Helplessness"},
-        ),
-        (
-            [
-                (F.startswith("name", "I") | F.endswith("name", "n"))
-                | F.eq("name", "Helplessness")
-            ],
-            {"Constipation", "Insomnia", "Helplessness"},
-        ),
-        ([F.and_(F.contains("name", "o"), F.contains("name", "ss"))], {"Hopelessness"}),
-        ([F.contains("name", "o") & F.contains("name", "ss")], {"Hopelessness"}),
-    ],
-)
+    assert {s.id for s in symptoms} == {hopelessness.id, helplessness.id}
+
+
+_FILTER_CASES = [
+    ([F.eq("name", "Insomnia")], {"Insomnia"}),
+    ([F.neq("name", "Insomnia")], {"Hopelessness", "Helplessness", "Constipation"}),
+    ([~F.eq("name", "Insomnia")], {"Hopelessness", "Helplessness", "Constipation"}),
+    ([F.contains("name", "les")], {"Hopelessness", "Helplessness"}),
+    ([F.contains("name", "LES")], set()),
+    ([F.ncontains("name", "les")], {"Insomnia", "Constipation"}),
+    (
+        [F.ncontains("name", "LES")],
+        {"Hopelessness", "Helplessness", "Insomnia", "Constipation"},
+    ),
+    ([F.icontains("name", "LES")], {"Hopelessness", "Helplessness"}),
+    ([F.nicontains("name", "LES")], {"Insomnia", "Constipation"}),
+    ([F.startswith("name", "H")], {"Hopelessness", "Helplessness"}),
+    ([F.startswith("name", "h")], set()),
+    ([F.nstartswith("name", "H")], {"Insomnia", "Constipation"}),
+    (
+        [F.nstartswith("name", "h")],
+        {"Hopelessness", "Helplessness", "Insomnia", "Constipation"},
+    ),
+    ([F.istartswith("name", "h")], {"Hopelessness", "Helplessness"}),
+    ([F.nistartswith("name", "h")], {"Insomnia", "Constipation"}),
+    ([F.endswith("name", "ness")], {"Hopelessness", "Helplessness"}),
+    ([F.endswith("name", "NESS")], set()),
+    ([F.nendswith("name", "ness")], {"Insomnia", "Constipation"}),
+    (
+        [F.nendswith("name", "NESS")],
+        {"Hopelessness", "Helplessness", "Insomnia", "Constipation"},
+    ),
+    ([F.iendswith("name", "NESS")], {"Hopelessness", "Helplessness"}),
+    ([F.niendswith("name", "NESS")], {"Insomnia", "Constipation"}),
+    ([F.matches("name", r"^H.*s$")], {"Hopelessness", "Helplessness"}),
+    ([F.matches("name", r"^h.*s$")], set()),
+    ([F.nmatches("name", r"^H.*s$")], {"Insomnia", "Constipation"}),
+    (
+        [F.nmatches("name", r"^h.*s$")],
+        {"Hopelessness", "Helplessness", "Insomnia", "Constipation"},
+    ),
+    ([F.imatches("name", r"^h.*s$")], {"Hopelessness", "Helplessness"}),
+    ([F.nimatches("name", r"^h.*s$")], {"Insomnia", "Constipation"}),
+    ([F.in_("name", ("Insomnia", "Constipation"))], {"Insomnia", "Constipation"}),
+    (
+        [F.nin("name", ("Insomnia", "Constipation"))],
+        {"Hopelessness", "Helplessness"},
+    ),
+    ([F.lt("id", 2)], {"Hopelessness"}),
+    ([F.lte("id", 2)], {"Hopelessness", "Helplessness"}),
+    ([F.gt("id", 3)], {"Constipation"}),
+    ([F.gte("id", 3)], {"Insomnia", "Constipation"}),
+    (
+        [
+            F.or_(
+                F.or_(F.startswith("name", "I"), F.endswith("name", "n")),
+                F.eq("name", "Helplessness"),
+            )
+        ],
+        {"Constipation", "Insomnia", "Helplessness"},
+    ),
+    (
+        [
+            (F.startswith("name", "I") | F.endswith("name", "n"))
+            | F.eq("name", "Helplessness")
+        ],
+        {"Constipation", "Insomnia", "Helplessness"},
+    ),
+    ([F.and_(F.contains("name", "o"), F.contains("name", "ss"))], {"Hopelessness"}),
+    ([F.contains("name", "o") & F.contains("name", "ss")], {"Hopelessness"}),
+]
+
+
+@pytest.mark.parametrize("filters, names", _FILTER_CASES)
 async def test_get_many_with_filter(
     filters: Sequence[F],
     names: set[str],
@@ -397,3 +397,109 @@ async def test_has_any_filter(
 ) -> None:
     websites = list(await websites_repo.get_many([filter_]))
     assert [w.id for w in websites] == ids
+
+
+class IndexedSymptomsDictRepo(SymptomsDictRepo):
+    indexed_fields = ("type",)
+
+
+@pytest.fixture
+def indexed_symptoms_repo(storage: dict) -> SymptomsRepo:
+    return IndexedSymptomsDictRepo(storage)
+
+
+async def test_indexed_field_lookup(indexed_symptoms_repo: SymptomsRepo) -> None:
+    insomnia = Symptom(id=1, name="Insomnia", type=SymptomType.PHYSICAL)
+    hopelessness = Symptom(id=2, name="Hopelessness", type=SymptomType.PSYCHOLOGICAL)
+    await indexed_symptoms_repo.add_many([insomnia, hopelessness])
+
+    s = await indexed_symptoms_repo.get(type=SymptomType.PHYSICAL)
+    assert s == insomnia
+    assert await indexed_symptoms_repo.count(type=SymptomType.PSYCHOLOGICAL) == 1
+    symptoms = list(
+        await indexed_symptoms_repo.get_many([F.eq("type", SymptomType.PHYSICAL)])
+    )
+    assert symptoms == [insomnia]
+
+
+async def test_indexed_field_tracks_updates(
+    indexed_symptoms_repo: SymptomsRepo,
+) -> None:
+    insomnia = Symptom(id=1, name="Insomnia", type=SymptomType.PHYSICAL)
+    await indexed_symptoms_repo.add(insomnia)
+
+    insomnia.type = SymptomType.PSYCHOLOGICAL
+    await indexed_symptoms_repo.update(insomnia)
+
+    assert await indexed_symptoms_repo.exists(type=SymptomType.PHYSICAL) is False
+    assert await indexed_symptoms_repo.exists(type=SymptomType.PSYCHOLOGICAL) is True
+
+
+async def test_indexed_field_tracks_deletes(
+    indexed_symptoms_repo: SymptomsRepo,
+) -> None:
+    insomnia = Symptom(id=1, name="Insomnia", type=SymptomType.PHYSICAL)
+    back_pain = Symptom(id=2, name="Back pain", type=SymptomType.PHYSICAL)
+    await indexed_symptoms_repo.add_many([insomnia, back_pain])
+
+    await indexed_symptoms_repo.delete(type=SymptomType.PHYSICAL)
+
+    assert await indexed_symptoms_repo.count(type=SymptomType.PHYSICAL) == 0
+    symptoms = list(
+        await indexed_symptoms_repo.get_many([F.eq("type", SymptomType.PHYSICAL)])
+    )
+    assert symptoms == []
+
+
+async def test_indexed_field_after_rollback(
+    storage: dict, indexed_symptoms_repo: SymptomsRepo
+) -> None:
+    insomnia = Symptom(id=1, name="Insomnia", type=SymptomType.PHYSICAL)
+    await indexed_symptoms_repo.add(insomnia)
+
+    try:
+        async with DictTransactionManager(storage):
+            await indexed_symptoms_repo.delete(id=insomnia.id)
+            raise RuntimeError("failed transaction test")
+    except RuntimeError:
+        pass
+
+    symptoms = list(
+        await indexed_symptoms_repo.get_many([F.eq("type", SymptomType.PHYSICAL)])
+    )
+    assert symptoms == [insomnia]
+
+
+async def test_indexed_field_with_unhashable_value(
+    indexed_symptoms_repo: SymptomsRepo,
+) -> None:
+    insomnia = Symptom(id=1, name="Insomnia", type=SymptomType.PHYSICAL)
+    await indexed_symptoms_repo.add(insomnia)
+
+    symptoms = list(
+        await indexed_symptoms_repo.get_many([F.eq("type", [SymptomType.PHYSICAL])])
+    )
+    assert symptoms == []
+    assert await indexed_symptoms_repo.count(type=[SymptomType.PHYSICAL]) == 0
+
+
+async def test_returned_entities_are_copies(
+    symptoms_repo: SymptomsRepo, hopelessness: Symptom
+) -> None:
+    s = await symptoms_repo.get(id=hopelessness.id)
+    s.name = "Despair"
+
+    s = await symptoms_repo.get(id=hopelessness.id)
+    assert s.name == "Hopelessness"
+
+
+class SharingSymptomsDictRepo(SymptomsDictRepo):
+    copy_in = copy_out = staticmethod(lambda entity: entity)
+
+
+async def test_identity_copy_mode(storage: dict) -> None:
+    repo = SharingSymptomsDictRepo(storage)
+    insomnia = Symptom(id=1, name="Insomnia", type=SymptomType.PHYSICAL)
+    await repo.add(insomnia)
+
+    assert await repo.get(id=insomnia.id) is insomnia